@@ -1,101 +1,135 @@
 """Core analysis functions for Google Scholar citations."""
 
+import asyncio
+import contextlib
 import logging
+import math
+import random
+import re
+import sqlite3
 import time
-import json
-from .driver import (
-    create_stealth_driver, 
-    safe_get_url, 
-    human_like_delay
+import traceback
+import orjson
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from .cache import PageCache
+from .driver import human_like_delay_async
+from .http_client import ScholarFetcher, SCHOLAR_BASE_URL, create_async_client
+from .utils import save_interim_results
+from .parsers import (
+    extract_authors,
+    author_surnames,
+    author_keys,
+    has_author_overlap,
+    parse_author_details,
+    parse_publication_rows,
+    parse_citation_results,
+    has_next_page,
+    parse_result_count,
+    is_empty_citation_page
 )
-from .parsers import extract_authors, has_author_overlap
 
 logger = logging.getLogger(__name__)
 
-def get_author_details(driver, profile_url):
-    """Get basic details about the author."""
-    if not safe_get_url(driver, profile_url):
+# Number of publications requested per profile page (Scholar's maximum)
+PUBLICATIONS_PAGE_SIZE = 100
+
+# Number of citing papers requested per "Cited by" page (Scholar's maximum)
+CITATIONS_PAGE_SIZE = 20
+
+# Scholar only lists the first 1000 results of any search
+MAX_LISTED_CITATIONS = 1000
+
+# Patterns used for every citation, compiled once
+_RE_BRACKETED = re.compile(r'\[[^\]]+\]')  # [PDF], [HTML], etc. in titles
+_RE_YEAR = re.compile(r'\b(19|20)\d{2}\b')
+
+# Publications whose citations are fetched at the same time
+MAX_CONCURRENT_PAPERS = 8
+
+def get_author_details(fetcher, profile_url, first_page=None):
+    """Get basic details about the author.
+    
+    They are read from the first publications page; ``first_page`` is its
+    already fetched HTML, if any.
+    """
+    page_url = publications_page_url(profile_url, 0)
+    html = first_page if first_page is not None else fetcher.get(page_url, wait_for="#gsc_prf_in")
+    if html is None:
         return {'name': 'Unknown'}
     
     try:
-        # Wait for profile to load
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.common.exceptions import NoSuchElementException
-        
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.ID, "gsc_prf_in"))
-        )
-        
-        author_name = driver.find_element(By.ID, "gsc_prf_in").text
-        
-        # Try to get additional details if available
-        details = {'name': author_name}
-        
-        try:
-            affiliation = driver.find_element(By.CSS_SELECTOR, ".gsc_prf_il").text
-            details['affiliation'] = affiliation
-        except NoSuchElementException:
-            pass
-            
+        details = parse_author_details(html)
+        if details['name'] != 'Unknown':
+            fetcher.store(page_url, html)
         return details
     
     except Exception as e:
         logger.error(f"Error getting author details: {e}")
         return {'name': 'Unknown'}
 
-def get_publications(driver, profile_url, max_papers=None):
-    """Get the list of publications for an author."""
-    publications = []
+def publications_page_url(profile_url, cstart, pagesize=PUBLICATIONS_PAGE_SIZE):
+    """Build the URL of one page of a profile's publication list."""
+    parts = urlsplit(profile_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in ('cstart', 'pagesize')]
+    query += [('cstart', str(cstart)), ('pagesize', str(pagesize))]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def citations_page_url(citation_url, start, num=CITATIONS_PAGE_SIZE):
+    """Build the URL of one page of a publication's "Cited by" list."""
+    parts = urlsplit(citation_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in ('start', 'num')]
+    if start:
+        query.append(('start', str(start)))
+    query.append(('num', str(num)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def sample_page_starts(citation_url, citation_count, max_citations, page_size=CITATIONS_PAGE_SIZE):
+    """Pick the start offsets of the "Cited by" pages to sample, spread over the whole list.
     
-    if not safe_get_url(driver, profile_url):
-        return publications
+    Scholar orders citations by relevance, so the first pages alone are a
+    biased sample. The first page is always included, since it carries the
+    exact result count the other offsets may need to be redrawn within. The
+    choice is seeded by the URL, so reruns fetch the same (cached) pages.
+    """
+    starts = range(0, min(citation_count, MAX_LISTED_CITATIONS), page_size)
+    pages = min(len(starts), math.ceil(max_citations / page_size))
+    return [0] + sorted(random.Random(citation_url).sample(starts[1:], pages - 1))
+
+def get_publications(fetcher, profile_url, max_papers=None, first_page=None):
+    """Get the list of publications for an author.
+    
+    ``first_page`` is the already fetched HTML of the first page, if any.
+    """
+    publications = []
+    paper_rows = []
     
     try:
-        # Wait for publications to load
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.common.exceptions import TimeoutException, NoSuchElementException
-        
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "gsc_a_tr"))
-        )
-        
-        # Click "Show more" until all papers are loaded or max_papers is reached
+        # Page through the profile with cstart/pagesize instead of clicking "Show more"
+        cstart = 0
         while True:
-            # Get current paper rows
-            paper_rows = driver.find_elements(By.CLASS_NAME, "gsc_a_tr")
+            page_url = publications_page_url(profile_url, cstart)
+            if cstart == 0 and first_page is not None:
+                html = first_page
+            else:
+                html = fetcher.get(page_url, wait_for=".gsc_a_tr")
+            if html is None:
+                break
+            
+            page_rows = parse_publication_rows(html, SCHOLAR_BASE_URL)
+            if page_rows:
+                fetcher.store(page_url, html)
+            paper_rows.extend(page_rows)
             
             if max_papers and len(paper_rows) >= max_papers:
                 # Enough papers loaded
                 break
-                
-            try:
-                # Try to find the "Show more" button with increased wait time
-                show_more_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.ID, "gsc_bpf_more"))
-                )
-                
-                # Check if button is disabled
-                if "disabled" in show_more_button.get_attribute("class"):
-                    logger.info("Show more button is disabled, all papers loaded")
-                    break
-                
-                # Scroll to button and click with human-like behavior
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", show_more_button)
-                human_like_delay(1, 2)
-                show_more_button.click()
-                human_like_delay(2, 5)
-                
-            except TimeoutException:
-                # No more "Show more" button or it's not clickable
-                logger.info("No more papers to load or show more button not found")
+            
+            if len(page_rows) < PUBLICATIONS_PAGE_SIZE:
+                logger.info("All papers loaded")
                 break
+            
+            cstart += PUBLICATIONS_PAGE_SIZE
         
-        # Get all paper rows after loading
-        paper_rows = driver.find_elements(By.CLASS_NAME, "gsc_a_tr")
         if max_papers:
             paper_rows = paper_rows[:max_papers]
         
@@ -103,50 +137,28 @@ def get_publications(driver, profile_url, max_papers=None):
         
         for i, paper_row in enumerate(paper_rows):
             try:
-                # Get paper title and link
-                title_element = paper_row.find_element(By.CLASS_NAME, "gsc_a_at")
-                title = title_element.text
-                paper_url = title_element.get_attribute("href")
-                
-                # Get authors (first gs_gray element)
-                authors_element = paper_row.find_elements(By.CLASS_NAME, "gs_gray")[0]
-                authors = authors_element.text
-                
-                # Get citation count and URL
-                citation_element = paper_row.find_element(By.CLASS_NAME, "gsc_a_ac")
-                citation_text = citation_element.text.strip()
+                citation_text = paper_row['citations']
                 citation_count = int(citation_text) if citation_text.isdigit() else 0
-                citation_url = citation_element.get_attribute("href") if citation_count > 0 else None
+                citation_url = paper_row['citation_url'] if citation_count > 0 else None
                 
-                # Get venue/journal (second gs_gray element)
-                venue_element = paper_row.find_elements(By.CLASS_NAME, "gs_gray")[1]
-                venue = venue_element.text
+                year_text = paper_row['year']
+                year = int(year_text) if year_text.isdigit() else None
                 
-                # Get year (optional)
-                year = None
-                try:
-                    year_element = paper_row.find_element(By.CLASS_NAME, "gsc_a_h")
-                    year_text = year_element.text.strip()
-                    if year_text.isdigit():
-                        year = int(year_text)
-                except NoSuchElementException:
-                    pass
+                author_list = extract_authors(paper_row['authors'])
                 
                 publications.append({
-                    'title': title,
-                    'url': paper_url,
-                    'authors': authors,
-                    'author_list': extract_authors(authors),
+                    'title': paper_row['title'],
+                    'url': paper_row['url'],
+                    'authors': paper_row['authors'],
+                    'author_list': author_list,
+                    'author_surnames': author_surnames(author_list),
+                    'author_keys': author_keys(author_list),
                     'citation_count': citation_count,
                     'citation_url': citation_url,
-                    'venue': venue,
+                    'venue': paper_row['venue'],
                     'year': year,
                     'index': i + 1
                 })
-                
-                # Occasionally introduce variation in processing time
-                if random.random() < 0.2:
-                    human_like_delay(0.5, 1.5)
             
             except Exception as e:
                 logger.error(f"Error extracting publication #{i+1}: {e}")
@@ -158,173 +170,324 @@ def get_publications(driver, profile_url, max_papers=None):
         logger.error(f"Error getting publications: {e}")
         return []
 
-def get_citations(driver, citation_url, original_authors, max_citations=None, retries=2):
-    """Get the list of papers that cite a specific publication."""
-    import re
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+async def get_citations(fetcher, client, citation_url, original_authors, max_citations=None, retries=2, original_surnames=None,
+                        citation_count=None, early_stop_pages=None, original_keys=None):
+    """Get the list of papers that cite a specific publication.
+    
+    Pages are fetched with the async ``client``; the request rate is capped
+    by the rate limiter shared by all concurrently analyzed publications.
+    ``original_surnames`` and ``original_keys`` are the precomputed
+    :func:`author_surnames` and :func:`author_keys` of ``original_authors``.
+    
+    When ``max_citations`` is below ``citation_count``, the pages read are
+    spread over the whole list (see :func:`sample_page_starts`).
     
+    With ``early_stop_pages``, pagination stops once that many consecutive
+    pages had no citing paper sharing a surname with the original authors,
+    provided at least sqrt(``citation_count``) citations were sampled. The
+    caller then extrapolates from the sample.
+    """
     if not citation_url:
         return []
     
+    if original_surnames is None:
+        original_surnames = author_surnames(original_authors)
+    if original_keys is None:
+        original_keys = author_keys(original_authors)
+    
     citations = []
     page_num = 0
     total_citations = 0
+    pages_without_candidates = 0
+    
+    # Don't ask for more rows per page than will be checked
+    page_size = min(CITATIONS_PAGE_SIZE, max_citations) if max_citations else CITATIONS_PAGE_SIZE
+    
+    sampled_starts = None
+    if max_citations and citation_count and citation_count > max_citations:
+        sampled_starts = sample_page_starts(citation_url, citation_count, max_citations, page_size)
     
     while True:
-        # Construct URL with page parameter if not the first page
-        current_url = citation_url
-        if page_num > 0:
-            if "start=" in citation_url:
-                # Replace existing start parameter
-                current_url = re.sub(r'start=\d+', f'start={page_num*10}', citation_url)
-            else:
-                # Add start parameter
-                if "?" in citation_url:
-                    current_url = f"{citation_url}&start={page_num*10}"
-                else:
-                    current_url = f"{citation_url}?start={page_num*10}"
+        start = sampled_starts[page_num] if sampled_starts else page_num * page_size
+        current_url = citations_page_url(citation_url, start, page_size)
         
-        if not safe_get_url(driver, current_url):
-            if retries > 0:
-                logger.warning(f"Retrying citation page, {retries} attempts left")
-                human_like_delay(10, 20)  # Longer delay before retry
-                return get_citations(driver, citation_url, original_authors, max_citations, retries-1)
-            else:
-                logger.error("Failed to load citation page after retries")
-                return citations
-        
-        try:
-            # Check if page loaded properly
-            from .driver import check_for_captcha
-            
-            if check_for_captcha(driver):
-                logger.warning("CAPTCHA detected on citation page")
-                if retries > 0:
-                    human_like_delay(15, 30)
-                    return get_citations(driver, citation_url, original_authors, max_citations, retries-1)
-                else:
-                    return citations
+        # Retry only the failing page, keeping the citations already collected
+        retry_delay = None
+        for attempt in range(retries + 1):
+            if retry_delay is not None:
+                logger.warning(f"Retrying citation page {page_num}, {retries - attempt + 1} attempts left")
+                await human_like_delay_async(*retry_delay)
             
-            # Wait for citations to load
             try:
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "gs_ri"))
-                )
-            except TimeoutException:
-                # Check if it's actually empty results
-                if "no citations were found" in driver.page_source.lower() or driver.find_elements(By.ID, "gs_ccl_results") and not driver.find_elements(By.CLASS_NAME, "gs_ri"):
-                    logger.info("No citations found for this paper")
-                    return citations
-                else:
-                    logger.warning("Timeout waiting for citation elements")
-                    if retries > 0:
-                        human_like_delay(5, 10)
-                        return get_citations(driver, citation_url, original_authors, max_citations, retries-1)
-                    else:
-                        return citations
-            
-            # Get citation elements
-            citation_elements = driver.find_elements(By.CLASS_NAME, "gs_ri")
+                # A retry must not be answered with the cached copy that just failed
+                html = await fetcher.get_async(client, current_url, wait_for=".gs_ri", refresh=attempt > 0)
+            except Exception as e:
+                # Browser fallback failures are retried like any other failed load
+                logger.error(f"Error fetching citation page {page_num}: {e}")
+                html = None
             
-            # Process citation elements
-            for citation_element in citation_elements:
-                try:
-                    # Get title
-                    title_element = citation_element.find_element(By.CLASS_NAME, "gs_rt")
-                    title = title_element.text
-                    # Clean up title (remove [PDF], [HTML], etc.)
-                    title = re.sub(r'\[[^\]]+\]', '', title).strip()
-                    
-                    # Try to get URL
-                    url = None
-                    try:
-                        link_element = title_element.find_element(By.TAG_NAME, "a")
-                        url = link_element.get_attribute("href")
-                    except NoSuchElementException:
-                        pass
-                    
-                    # Get authors and publication info
-                    info_element = citation_element.find_element(By.CLASS_NAME, "gs_a")
-                    info_text = info_element.text
-                    
-                    # Extract just the author part (before first dash)
-                    authors = info_text.split('-')[0].strip() if '-' in info_text else info_text
-                    
-                    # Extract year if available
-                    year_match = re.search(r'\b(19|20)\d{2}\b', info_text)
-                    year = int(year_match.group(0)) if year_match else None
-                    
-                    # Extract venue
-                    venue_parts = info_text.split('-')
-                    venue = venue_parts[1].strip() if len(venue_parts) > 1 else ""
-                    
-                    # Check for self-citation
-                    citing_authors = extract_authors(authors)
-                    is_self_citation = has_author_overlap(original_authors, citing_authors)
-                    
-                    citation_data = {
-                        'title': title,
-                        'url': url,
-                        'authors': authors,
-                        'author_list': citing_authors,
-                        'year': year,
-                        'venue': venue,
-                        'is_self_citation': is_self_citation
-                    }
-                    
-                    citations.append(citation_data)
-                    total_citations += 1
-                    
-                    # Break if we've reached the max citations
-                    if max_citations and total_citations >= max_citations:
-                        return citations
-                
-                except Exception as e:
-                    logger.error(f"Error extracting citation details: {e}")
-                    continue
+            if html is None:
+                logger.warning("Failed to load citation page")
+                retry_delay = (10, 20)  # Longer delay before retry
+                continue
             
-            # Check if there's a "Next" button for pagination
-            next_button = None
             try:
-                next_buttons = driver.find_elements(By.CSS_SELECTOR, ".gs_btnPR")
-                for button in next_buttons:
-                    if "Next" in button.get_attribute("innerHTML"):
-                        next_button = button
-                        break
-            except NoSuchElementException:
-                next_button = None
+                # Get citation elements
+                citation_elements = parse_citation_results(html, SCHOLAR_BASE_URL)
+            except Exception as e:
+                logger.error(f"Error processing citation page {page_num}: {e}")
+                retry_delay = (0, 0)
+                continue
             
-            # If no next button or no citations on this page, we're done
-            if not next_button or not citation_elements:
+            # Check if it's actually empty results
+            if citation_elements or is_empty_citation_page(html):
                 break
-                
-            # Move to next page
-            page_num += 1
             
-            # If we have enough citations, exit
-            if max_citations and total_citations >= max_citations:
-                break
-                
-            # Wait between page navigations (longer delay)
-            human_like_delay(3, 7)
+            logger.warning("No citation elements found on page")
+            retry_delay = (5, 10)
+        else:
+            logger.error("Failed to load citation page after retries")
+            return citations
         
-        except Exception as e:
-            logger.error(f"Error processing citation page {page_num}: {e}")
-            if retries > 0:
-                return get_citations(driver, citation_url, original_authors, max_citations, retries-1)
-            else:
-                break
+        fetcher.store(current_url, html)
+        
+        if not citation_elements:
+            logger.info("No citations found for this paper")
+            return citations
+        
+        # Process citation elements
+        page_has_candidates = False
+        for citation_element in citation_elements:
+            try:
+                # Clean up title (remove [PDF], [HTML], etc.)
+                title = _RE_BRACKETED.sub('', citation_element['title']).strip()
+                url = citation_element['url']
+            
+                # Get authors and publication info
+                info_text = citation_element['info']
+            
+                # Extract just the author part (before first dash)
+                authors = info_text.split('-')[0].strip() if '-' in info_text else info_text
+            
+                # Extract year if available
+                year_match = _RE_YEAR.search(info_text)
+                year = int(year_match.group(0)) if year_match else None
+            
+                # Extract venue
+                venue_parts = info_text.split('-')
+                venue = venue_parts[1].strip() if len(venue_parts) > 1 else ""
+            
+                # Check for self-citation
+                citing_authors = extract_authors(authors)
+                # Matching authors always share a surname, so rule most citations out with one set check
+                is_candidate = not original_surnames.isdisjoint(author_surnames(citing_authors))
+                page_has_candidates = page_has_candidates or is_candidate
+                is_self_citation = is_candidate and has_author_overlap(original_authors, citing_authors, original_keys)
+            
+                citation_data = {
+                    'title': title,
+                    'url': url,
+                    'authors': authors,
+                    'author_list': citing_authors,
+                    'year': year,
+                    'venue': venue,
+                    'is_self_citation': is_self_citation
+                }
+            
+                citations.append(citation_data)
+                total_citations += 1
+            
+                # Break if we've reached the max citations
+                if max_citations and total_citations >= max_citations:
+                    return citations
+        
+            except Exception as e:
+                logger.error(f"Error extracting citation details: {e}")
+                continue
+        
+        # Scholar's own result count can be lower than the profile's citation count
+        if page_num == 0:
+            result_count = parse_result_count(html)
+            if result_count and (not citation_count or result_count < citation_count):
+                citation_count = result_count
+                # Sampled offsets past the real end would only return empty pages
+                if sampled_starts:
+                    sampled_starts = (sample_page_starts(citation_url, citation_count, max_citations, page_size)
+                                      if citation_count > max_citations else None)
+        
+        # If every citation fits up to this page, or there is no next button, we're done
+        if (citation_count and citation_count <= start + page_size) or not has_next_page(html):
+            break
+        
+        if sampled_starts and page_num + 1 >= len(sampled_starts):
+            break
+        
+        # Move to next page
+        page_num += 1
+        
+        # Stop sampling long tails that show no sign of self-citation
+        pages_without_candidates = 0 if page_has_candidates else pages_without_candidates + 1
+        if (early_stop_pages and citation_count
+                and pages_without_candidates >= early_stop_pages
+                and total_citations >= math.sqrt(citation_count)):
+            logger.info(f"No possible self-citations in the last {pages_without_candidates} pages, stopping after {total_citations} citations")
+            break
     
     return citations
 
-def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper=None, visible=True, output_file=None):
-    """Analyze self-citations for a Google Scholar profile."""
-    import random
+async def _fetch_publication_citations(fetcher, client, semaphore, pub, total, max_citations_per_paper, early_stop_pages):
+    """Fetch the citations of one publication once a concurrency slot is free."""
+    async with semaphore:
+        logger.info(f"[{pub['index']}/{total}] Analyzing: {pub['title'][:50]}{'...' if len(pub['title']) > 50 else ''}")
+        
+        if not (pub['citation_count'] > 0 and pub['citation_url']):
+            logger.info(f"  [{pub['index']}] No citations to analyze.")
+            return pub, []
+        
+        citations_to_check = min(pub['citation_count'], max_citations_per_paper) if max_citations_per_paper else pub['citation_count']
+        logger.info(f"  [{pub['index']}] Checking up to {citations_to_check} of {pub['citation_count']} citations...")
+        
+        try:
+            citations = await get_citations(
+                fetcher, client, pub['citation_url'], pub['author_list'], max_citations_per_paper,
+                original_surnames=pub['author_surnames'],
+                original_keys=pub['author_keys'],
+                citation_count=pub['citation_count'],
+                early_stop_pages=early_stop_pages
+            )
+        except Exception as e:
+            # One failing publication must not abort the tally of the others
+            logger.error(f"  [{pub['index']}] Error getting citations: {e}")
+            logger.debug(traceback.format_exc())
+            citations = []
+        
+        return pub, citations
+
+async def _analyze_publications(fetcher, publications, results, max_citations_per_paper, output_file, concurrency, early_stop_pages):
+    """Fetch citations for all publications concurrently and tally self-citations."""
+    total_citations = 0
+    self_citations = 0
+    self_citation_details = []
     
-    driver = None
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with create_async_client() as client:
+        # Self-citation details are appended as JSON Lines next to the output file
+        details_file = f"{output_file}.details.jsonl" if output_file else None
+        with (open(details_file, 'wb') if details_file else contextlib.nullcontext()) as details_stream:
+            tasks = [
+                _fetch_publication_citations(fetcher, client, semaphore, pub, len(publications), max_citations_per_paper, early_stop_pages)
+                for pub in publications
+            ]
+        
+            # Tally each publication as soon as its citations arrive
+            for i, task in enumerate(asyncio.as_completed(tasks)):
+                pub, citations = await task
+            
+                if pub['citation_count'] > 0 and pub['citation_url']:
+                    total_citations += pub['citation_count']
+                
+                    # Count self-citations, filtering the citations once for both the tally and the details
+                    self_cited = [citation for citation in citations if citation['is_self_citation']]
+                    pub_self_citations = len(self_cited)
+                
+                    # If we didn't check all citations, estimate the total self-citations
+                    sampled = (
+                        (max_citations_per_paper and pub['citation_count'] > max_citations_per_paper)
+                        or (early_stop_pages and len(citations) < pub['citation_count'])
+                    )
+                    if sampled:
+                        # Calculate the ratio of self-citations in the sample
+                        if citations:
+                            self_cite_ratio = pub_self_citations / len(citations)
+                            # Estimate total self-citations for this paper
+                            estimated_self_cites = round(self_cite_ratio * pub['citation_count'])
+                            logger.info(f"  [{pub['index']}] Found {pub_self_citations} self-citations in sample. Estimated total: {estimated_self_cites}")
+                            self_citations += estimated_self_cites
+                        else:
+                            logger.warning(f"  [{pub['index']}] No citations retrieved for estimation")
+                    else:
+                        # We checked all citations
+                        logger.info(f"  [{pub['index']}] Found {pub_self_citations} self-citations.")
+                        self_citations += pub_self_citations
+                
+                    # Collect details for self-citations
+                    for citation in self_cited:
+                        detail = {
+                            'paper_index': pub['index'],
+                            'original_paper': pub['title'],
+                            'original_authors': pub['authors'],
+                            'original_year': pub['year'],
+                            'citing_paper': citation['title'],
+                            'citing_authors': citation['authors'],
+                            'citing_year': citation['year']
+                        }
+                        self_citation_details.append(detail)
+                        
+                        # Stream new details so partial saves stay small
+                        if details_stream:
+                            details_stream.write(orjson.dumps(detail) + b"\n")
+            
+                # Save a summary of intermediate results to avoid losing progress in case of errors
+                if output_file:
+                    details_stream.flush()
+                    save_interim_results({
+                        'author': results['author'],
+                        'total_papers': len(publications),
+                        'analyzed_papers': i + 1,
+                        'total_citations': total_citations,
+                        'self_citations': self_citations,
+                        'self_citation_percentage': (self_citations / total_citations * 100) if total_citations > 0 else 0,
+                        'self_citation_count': len(self_citation_details),
+                        'self_citation_details_file': details_file,
+                        'status': 'in_progress',
+                        'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+                    }, output_file)
+    
+    # Keep details in publication order regardless of completion order
+    self_citation_details.sort(key=lambda detail: detail['paper_index'])
+    
+    # Calculate final results
+    results['total_citations'] = total_citations
+    results['self_citations'] = self_citations
+    results['self_citation_percentage'] = (self_citations / total_citations * 100) if total_citations > 0 else 0
+    results['self_citation_details'] = self_citation_details
+
+def open_page_cache():
+    """Open the default on-disk page cache, or return None if it is unavailable."""
+    try:
+        return PageCache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Page cache disabled: {e}")
+        return None
+
+def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper=None, visible=True, output_file=None,
+                           concurrency=MAX_CONCURRENT_PAPERS, early_stop_pages=None, use_cache=True, fetcher=None):
+    """Analyze self-citations for a Google Scholar profile.
+    
+    Citations of up to ``concurrency`` publications are fetched in parallel.
+    ``early_stop_pages`` enables early termination of citation sampling (see
+    :func:`get_citations`). With ``use_cache=False`` every page is fetched
+    from Scholar instead of the on-disk page cache.
+    
+    Pass a :class:`ScholarFetcher` as ``fetcher`` to share its browser and
+    cache across several profiles; it is then left open for the caller to
+    close. ``visible`` and ``use_cache`` only apply when no fetcher is given.
+    
+    Runs its own event loop, so it must not be called from inside one.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # asyncio.run() cannot nest, and failing later would be hidden behind an empty result
+        raise RuntimeError(
+            "analyze_self_citations() cannot be called from a running event loop (e.g. Jupyter); "
+            "run it in a worker thread instead, for example with loop.run_in_executor()"
+        )
+    
+    owns_fetcher = fetcher is None
     results = {
         'author': {'name': 'Unknown'},
         'total_papers': 0,
@@ -339,17 +502,20 @@ def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper
         logger.info(f"Starting analysis of: {profile_url}")
         logger.info(f"Settings: max_papers={max_papers}, max_citations_per_paper={max_citations_per_paper}")
         
-        # Create a new driver with stealth settings
-        driver = create_stealth_driver(headless=not visible)
+        # Fetch pages over HTTP; a stealth browser is only started on CAPTCHA
+        if owns_fetcher:
+            fetcher = ScholarFetcher(visible=visible, cache=open_page_cache() if use_cache else None)
         
         # Get author details
         logger.info("Getting author details...")
-        author = get_author_details(driver, profile_url)
+        # The first page of the publication list also carries the profile header
+        first_page = fetcher.get(publications_page_url(profile_url, 0), wait_for="#gsc_prf_in")
+        author = get_author_details(fetcher, profile_url, first_page)
         results['author'] = author
         
         # Get publications
         logger.info(f"Getting publications for {author['name']}...")
-        publications = get_publications(driver, profile_url, max_papers)
+        publications = get_publications(fetcher, profile_url, max_papers, first_page)
         
         if not publications:
             logger.warning("No publications found. Check if the profile is accessible.")
@@ -361,87 +527,19 @@ def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper
         logger.info(f"Found {len(publications)} publications.")
         
         # Process citations and analyze self-citations
-        total_citations = 0
-        self_citations = 0
-        self_citation_details = []
-        
-        for i, pub in enumerate(publications):
-            logger.info(f"[{i+1}/{len(publications)}] Analyzing: {pub['title'][:50]}{'...' if len(pub['title']) > 50 else ''}")
-            
-            if pub['citation_count'] > 0 and pub['citation_url']:
-                total_citations += pub['citation_count']
-                
-                citations_to_check = min(pub['citation_count'], max_citations_per_paper) if max_citations_per_paper else pub['citation_count']
-                logger.info(f"  Checking up to {citations_to_check} of {pub['citation_count']} citations...")
-                
-                # Get citations for this publication
-                citations = get_citations(driver, pub['citation_url'], pub['author_list'], max_citations_per_paper)
-                
-                # Count self-citations
-                pub_self_citations = sum(1 for citation in citations if citation['is_self_citation'])
-                
-                # If we didn't check all citations, estimate the total self-citations
-                if max_citations_per_paper and pub['citation_count'] > max_citations_per_paper:
-                    # Calculate the ratio of self-citations in the sample
-                    if citations:
-                        self_cite_ratio = pub_self_citations / len(citations)
-                        # Estimate total self-citations for this paper
-                        estimated_self_cites = round(self_cite_ratio * pub['citation_count'])
-                        logger.info(f"  Found {pub_self_citations} self-citations in sample. Estimated total: {estimated_self_cites}")
-                        self_citations += estimated_self_cites
-                    else:
-                        logger.warning("  No citations retrieved for estimation")
-                else:
-                    # We checked all citations
-                    logger.info(f"  Found {pub_self_citations} self-citations.")
-                    self_citations += pub_self_citations
-                
-                # Collect details for self-citations
-                for citation in citations:
-                    if citation['is_self_citation']:
-                        self_citation_details.append({
-                            'paper_index': pub['index'],
-                            'original_paper': pub['title'],
-                            'original_authors': pub['authors'],
-                            'original_year': pub['year'],
-                            'citing_paper': citation['title'],
-                            'citing_authors': citation['authors'],
-                            'citing_year': citation['year']
-                        })
-            else:
-                logger.info("  No citations to analyze.")
-            
-            # Save intermediate results to avoid losing progress in case of errors
-            if output_file and i % 5 == 0:
-                intermediate_results = {
-                    'author': results['author'],
-                    'total_papers': len(publications),
-                    'analyzed_papers': i + 1,
-                    'total_citations': total_citations,
-                    'self_citations': self_citations,
-                    'self_citation_percentage': (self_citations / total_citations * 100) if total_citations > 0 else 0,
-                    'self_citation_details': self_citation_details,
-                    'status': 'in_progress',
-                    'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                with open(f"{output_file}.partial", 'w', encoding='utf-8') as f:
-                    json.dump(intermediate_results, f, indent=2)
-        
-        # Calculate final results
-        results['total_citations'] = total_citations
-        results['self_citations'] = self_citations
-        results['self_citation_percentage'] = (self_citations / total_citations * 100) if total_citations > 0 else 0
-        results['self_citation_details'] = self_citation_details
+        asyncio.run(_analyze_publications(
+            fetcher, publications, results, max_citations_per_paper, output_file, concurrency, early_stop_pages
+        ))
         
         return results
     
     except Exception as e:
         logger.error(f"Error during analysis: {e}")
-        import traceback
         logger.error(traceback.format_exc())
         return results
     
     finally:
-        if driver:
-            driver.quit()
\ No newline at end of file
+        if owns_fetcher and fetcher:
+            fetcher.close()
+            if fetcher.cache:
+                fetcher.cache.close()
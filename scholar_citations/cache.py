@@ -0,0 +1,63 @@
+"""On-disk cache of fetched Google Scholar pages."""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "scholar_citations", "pages.sqlite")
+
+# Scholar profiles and citation lists change slowly, so a week-old copy is still useful
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+class PageCache:
+    """SQLite-backed cache of page HTML keyed by URL.
+
+    Expired entries are kept so they can still be served when Scholar
+    throttles a request (see ``allow_stale`` in :meth:`get`).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, html TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    def get(self, url, allow_stale=False):
+        """Return the cached HTML for a URL, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute("SELECT html, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+
+        if row is None:
+            return None
+
+        html, fetched_at = row
+        if not allow_stale and time.time() - fetched_at > self.ttl:
+            return None
+
+        return html
+
+    def set(self, url, html):
+        """Store the HTML of a successfully fetched page."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, html, fetched_at) VALUES (?, ?, ?)",
+                (url, html, time.time())
+            )
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -3,8 +3,8 @@
 import argparse
 import logging
 import traceback
-import json
 import sys
+import orjson
 from .analyzer import analyze_self_citations
 
 def setup_logging(debug=False):
@@ -25,7 +25,10 @@ def main():
     parser.add_argument('url', help='Google Scholar profile URL')
     parser.add_argument('--max-papers', type=int, default=None, help='Maximum number of papers to analyze')
     parser.add_argument('--max-citations', type=int, default=None, help='Maximum number of citations to check per paper')
+    parser.add_argument('--early-stop-pages', type=int, default=None,
+                        help='Stop fetching citations of a paper after this many pages without a possible self-citation, and estimate the rest')
     parser.add_argument('--output', type=str, default=None, help='Output file for detailed results (JSON)')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch every page from Scholar instead of the page cache')
     parser.add_argument('--visible', action='store_true', help='Show browser window during analysis')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     
@@ -38,7 +41,9 @@ def main():
             max_papers=args.max_papers, 
             max_citations_per_paper=args.max_citations,
             visible=args.visible,
-            output_file=args.output
+            output_file=args.output,
+            early_stop_pages=args.early_stop_pages,
+            use_cache=not args.no_cache
         )
         
         # Print results summary
@@ -61,8 +66,8 @@ def main():
         
         # Save detailed results if output file specified
         if args.output:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2)
+            with open(args.output, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
             print(f"\nDetailed results saved to: {args.output}")
         
         return 0
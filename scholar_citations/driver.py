@@ -1,7 +1,10 @@
 """Browser driver setup and management."""
 
+import asyncio
 import logging
+import os
 import random
+import threading
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -9,56 +12,215 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException, InvalidSessionIdException
 from webdriver_manager.chrome import ChromeDriverManager
 from fake_useragent import UserAgent
+from .parsers import page_has_captcha, CAPTCHA_PATTERN
 
 logger = logging.getLogger(__name__)
 
+# How long element lookups wait for the element to appear
+IMPLICIT_WAIT_SECONDS = 10
+
+# How long to wait for a CAPTCHA to be solved by hand
+CAPTCHA_SOLVE_SECONDS = 30
+
+# Long pages take about two seconds per scroll step, beyond WebDriver's 30 second script default
+SCROLL_TIMEOUT_SECONDS = 120
+
+# Set SCHOLAR_SIMULATE_SCROLL=1 to scroll profile pages like a reader after loading them
+SIMULATE_SCROLL = os.environ.get("SCHOLAR_SIMULATE_SCROLL") == "1"
+
+# Fallback if fake_useragent fails
+FALLBACK_USER_AGENTS = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+]
+
+_UA_POOL = None
+
+def random_user_agent():
+    """Return a random, realistic browser User-Agent string."""
+    global _UA_POOL
+    
+    # Loading fake_useragent's data is the expensive part, so only do it once
+    if _UA_POOL is None:
+        try:
+            _UA_POOL = UserAgent()
+        except Exception:
+            _UA_POOL = FALLBACK_USER_AGENTS
+    
+    if _UA_POOL is FALLBACK_USER_AGENTS:
+        return random.choice(FALLBACK_USER_AGENTS)
+    
+    try:
+        return _UA_POOL.random
+    except Exception:
+        return random.choice(FALLBACK_USER_AGENTS)
+
+class RateLimiter:
+    """Token bucket allowing ``max_requests`` requests per ``window`` seconds.
+    
+    Requests only block once the budget is used up. After a CAPTCHA or
+    HTTP 429, :meth:`backoff` doubles the window to slow everything down.
+    Safe to share between threads and coroutines.
+    """
+    
+    def __init__(self, max_requests=30, window=60.0, max_window=None):
+        self.max_requests = max_requests
+        self.window = window
+        self.max_window = max_window or window * 8
+        self._tokens = float(max_requests)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self):
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            rate = self.max_requests / self.window
+            self._tokens = min(self.max_requests, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / rate if self._tokens < 0 else 0.0
+    
+    def acquire(self):
+        """Block until a request may be made."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be made."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def backoff(self):
+        """Halve the request rate after being throttled."""
+        with self._lock:
+            self.window = min(self.window * 2, self.max_window)
+        logger.warning(f"Throttled by Scholar, rate limit window is now {self.window:.0f}s")
+
+def _create_rate_limiter():
+    # SCRAPER_RATE_LIMIT_DELAY is the average number of seconds per request
+    delay = float(os.environ.get("SCRAPER_RATE_LIMIT_DELAY", 2.0))
+    return RateLimiter(max_requests=30, window=30 * delay)
+
+# Shared by the HTTP client and the browser so they draw from one budget
+rate_limiter = _create_rate_limiter()
+
+def _human_like_seconds(min_seconds, max_seconds):
+    # Triangular, so delays cluster around the middle of the range
+    return random.triangular(min_seconds, max_seconds)
+
 def human_like_delay(min_seconds=2, max_seconds=5):
     """Add a random delay with non-uniform distribution to mimic human behavior."""
-    delay = min_seconds + (max_seconds - min_seconds) * (0.5 + 0.5 * (random.random() - 0.5))
-    time.sleep(delay)
+    time.sleep(_human_like_seconds(min_seconds, max_seconds))
+
+async def human_like_delay_async(min_seconds=2, max_seconds=5):
+    """Non-blocking variant of :func:`human_like_delay` for use in coroutines."""
+    await asyncio.sleep(_human_like_seconds(min_seconds, max_seconds))
+
+# Scrolls down the page in random steps with reading pauses, then calls back to the driver
+_SCROLL_JS = """
+const done = arguments[arguments.length - 1];
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const uniform = (min, max) => min + Math.random() * (max - min);
+(async () => {
+    const viewportHeight = window.innerHeight;
+    let position = 0;
+    // Re-read the height on every step, in case content loads while scrolling
+    while (position < document.body.scrollHeight) {
+        position += Math.floor(uniform(100, viewportHeight / 2 + 1));
+        window.scrollTo({top: position, behavior: 'smooth'});
+        await sleep(uniform(500, 2000));
+        if (Math.random() < 0.2) {
+            await sleep(uniform(2000, 4000));
+        }
+    }
+})().then(() => done(), () => done());
+"""
 
 def scroll_page_gradually(driver):
     """Scroll the page gradually to mimic human reading behavior."""
-    total_height = driver.execute_script("return document.body.scrollHeight")
-    viewport_height = driver.execute_script("return window.innerHeight")
-    current_position = 0
-    
-    while current_position < total_height:
-        scroll_distance = random.randint(100, viewport_height // 2)
-        current_position += scroll_distance
-        driver.execute_script(f"window.scrollTo({{top: {current_position}, behavior: 'smooth'}})")
-        time.sleep(random.uniform(0.5, 2.0))
-        if random.random() < 0.2:
-            time.sleep(random.uniform(2.0, 4.0))
+    # The whole scroll runs in the browser, so it costs one driver command instead of one per step
+    try:
+        driver.set_script_timeout(SCROLL_TIMEOUT_SECONDS)
+        driver.execute_async_script(_SCROLL_JS)
+    except TimeoutException:
+        logger.debug("Page scrolling outlasted the script timeout")
+
+# Runs the CAPTCHA pattern in the page so only a boolean crosses the driver connection
+# Same checks as page_has_captcha: the block phrases or Scholar's CAPTCHA container (parsers.CAPTCHA_MARKUP)
+_CAPTCHA_PROBE_JS = (
+    "return new RegExp(arguments[0], 'i').test(document.body ? document.body.innerText : '')"
+    " || !!document.getElementById('gs_captcha_ccl')"
+)
 
 def check_for_captcha(driver):
     """Check if Google is showing a CAPTCHA or block page."""
-    page_text = driver.page_source.lower()
-    
-    captcha_indicators = [
-        "our systems have detected unusual traffic",
-        "please show you're not a robot",
-        "please solve this captcha",
-        "we're sorry...",
-        "unusual traffic from your computer network",
-        "your computer or network may be sending automated queries"
-    ]
-    
-    for indicator in captcha_indicators:
-        if indicator in page_text:
-            return True
+    try:
+        return bool(driver.execute_script(_CAPTCHA_PROBE_JS, CAPTCHA_PATTERN))
+    except WebDriverException:
+        # Fall back to transferring and scanning the whole document
+        return page_has_captcha(driver.page_source)
+
+# Hides the usual automation giveaways from page scripts; wrapped so nothing leaks into the page's globals
+STEALTH_JS = """
+(() => {
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+    window.navigator.chrome = { runtime: {} };
+    window.navigator.languages = ['en-US', 'en'];
+})();
+"""
+
+# Requests a headless browser never needs to make
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.gif", "*.woff", "*.woff2",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*"
+]
+
+_chromedriver_path = None
+
+def chromedriver_path():
+    """Return the ChromeDriver binary path, resolving it only on first use."""
+    global _chromedriver_path
+    
+    if _chromedriver_path is None:
+        _chromedriver_path = ChromeDriverManager().install()
     
-    return False
+    return _chromedriver_path
 
 def create_stealth_driver(headless=False):
     """Create a WebDriver with anti-detection measures."""
     options = Options()
     
+    # Never prompt for notification permission
+    prefs = {"profile.default_content_setting_values.notifications": 2}
+    
     if headless:
         options.add_argument("--headless=new")
+        
+        # Nobody can solve a CAPTCHA in a headless browser, so skip the assets only a person looks at
+        prefs.update({
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2
+        })
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    
+    options.add_experimental_option("prefs", prefs)
+    
+    # Return from driver.get on DOMContentLoaded; the page source is all that gets read
+    options.page_load_strategy = 'eager'
     
     # Essential settings to avoid detection
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -73,38 +235,23 @@ def create_stealth_driver(headless=False):
     options.add_argument("--lang=en-US,en;q=0.9")
     
     # Use rotating user agents
-    try:
-        ua = UserAgent()
-        user_agent = ua.random
-    except Exception:
-        # Fallback if fake_useragent fails
-        user_agents = [
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-        ]
-        user_agent = random.choice(user_agents)
-    
-    options.add_argument(f"user-agent={user_agent}")
+    options.add_argument(f"user-agent={random_user_agent()}")
     
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        service = Service(chromedriver_path())
+        # Reuse one connection to chromedriver for every command
+        driver = webdriver.Chrome(service=service, options=options, keep_alive=True)
         
-        # Anti-detection measures via JavaScript
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        driver.execute_script("""
-        const originalQuery = window.navigator.permissions.query;
-        window.navigator.permissions.query = (parameters) => (
-            parameters.name === 'notifications' ?
-                Promise.resolve({ state: Notification.permission }) :
-                originalQuery(parameters)
-        );
-        """)
-        driver.execute_script("""
-        window.navigator.chrome = { runtime: {} };
-        window.navigator.languages = ['en-US', 'en'];
-        """)
+        # Let element lookups poll inside the browser instead of from the client
+        driver.implicitly_wait(IMPLICIT_WAIT_SECONDS)
+        
+        # Anti-detection measures, installed once to run before any page script on every new document
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_JS})
+        
+        if headless:
+            # Also drop trackers and anything the content settings let through
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
         
         return driver
     except Exception as e:
@@ -115,12 +262,13 @@ def safe_get_url(driver, url, retry_count=3):
     """Safely navigate to a URL with retry logic and CAPTCHA detection."""
     for attempt in range(retry_count):
         try:
+            rate_limiter.acquire()
             driver.get(url)
-            human_like_delay(3, 6)
             
             # Check for CAPTCHA
             if check_for_captcha(driver):
                 logger.warning(f"CAPTCHA detected on attempt {attempt+1}!")
+                rate_limiter.backoff()
                 
                 if not driver.execute_script("return document.querySelector('iframe[title*=recaptcha]')"):
                     # If no recaptcha iframe, it might be a block page
@@ -128,21 +276,28 @@ def safe_get_url(driver, url, retry_count=3):
                     return False
                 else:
                     logger.warning("CAPTCHA challenge present, waiting for manual intervention...")
-                    # If in visible mode, give user time to solve CAPTCHA
-                    time.sleep(30)  # 30 seconds to solve CAPTCHA
-                    if check_for_captcha(driver):
+                    # If in visible mode, give user time to solve CAPTCHA, continuing as soon as it is gone
+                    try:
+                        WebDriverWait(driver, CAPTCHA_SOLVE_SECONDS, poll_frequency=0.5).until(
+                            lambda d: not check_for_captcha(d)
+                        )
+                    except TimeoutException:
                         logger.error("CAPTCHA not solved, retrying...")
                         continue
-                    else:
-                        logger.info("CAPTCHA appears to be solved, continuing...")
-                        return True
+                    logger.info("CAPTCHA appears to be solved, continuing...")
+                    return True
             
-            # Simulate human-like reading behavior occasionally
-            if random.random() < 0.3:
+            # Scholar cannot see client-side scrolling, so only simulate reading when asked to,
+            # and only on profile pages rather than on every "Cited by" page
+            if SIMULATE_SCROLL and "cites=" not in url and random.random() < 0.3:
                 scroll_page_gradually(driver)
             
             return True
-            
+        
+        except InvalidSessionIdException:
+            # The browser is gone; retrying with this driver cannot succeed
+            raise
+        
         except WebDriverException as e:
             logger.warning(f"Error navigating to {url} on attempt {attempt+1}: {e}")
             human_like_delay(5, 10)  # Longer delay between retries
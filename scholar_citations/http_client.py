@@ -0,0 +1,224 @@
+"""Direct HTTP access to Google Scholar with a browser fallback for CAPTCHAs."""
+
+import asyncio
+import logging
+import threading
+import httpx
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from .driver import create_stealth_driver, safe_get_url, random_user_agent, rate_limiter
+from .parsers import page_has_captcha
+
+logger = logging.getLogger(__name__)
+
+SCHOLAR_BASE_URL = "https://scholar.google.com"
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# HTTP/2 multiplexes requests, so a few connections to scholar.google.com are plenty
+CONNECTION_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+
+# Retries for failed connection attempts; HTTP error responses are handled by the callers
+CONNECT_RETRIES = 3
+
+_client = None
+
+class CaptchaError(Exception):
+    """Raised when Scholar answers a request with a CAPTCHA page."""
+
+def _client_options(transport):
+    return {
+        'transport': transport,
+        'headers': {**DEFAULT_HEADERS, "User-Agent": random_user_agent()},
+        'follow_redirects': True,
+        'timeout': 30
+    }
+
+def get_client():
+    """Return the shared, connection-pooled HTTP client."""
+    global _client
+
+    if _client is None:
+        transport = httpx.HTTPTransport(http2=True, limits=CONNECTION_LIMITS, retries=CONNECT_RETRIES)
+        _client = httpx.Client(**_client_options(transport))
+
+    return _client
+
+def create_async_client():
+    """Create a connection-pooled async HTTP client for concurrent fetching."""
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=CONNECTION_LIMITS, retries=CONNECT_RETRIES)
+    return httpx.AsyncClient(**_client_options(transport))
+
+def fetch_html(url):
+    """Fetch a page over HTTP, returning its HTML or None if throttled or failed.
+
+    Raises :class:`CaptchaError` if Scholar asks for a CAPTCHA.
+    """
+    rate_limiter.acquire()
+    try:
+        response = get_client().get(url)
+    except httpx.HTTPError as e:
+        logger.warning(f"HTTP error fetching {url}: {e}")
+        return None
+
+    return _response_html(url, response)
+
+async def fetch_html_async(client, url):
+    """Async variant of :func:`fetch_html` using an ``httpx.AsyncClient``."""
+    await rate_limiter.acquire_async()
+    try:
+        response = await client.get(url)
+    except httpx.HTTPError as e:
+        logger.warning(f"HTTP error fetching {url}: {e}")
+        return None
+
+    return _response_html(url, response)
+
+def _response_html(url, response):
+    if page_has_captcha(response.text):
+        logger.warning(f"CAPTCHA response for {url}")
+        rate_limiter.backoff()
+        raise CaptchaError(url)
+
+    if response.status_code == 429:
+        logger.warning(f"Rate limit response for {url}")
+        rate_limiter.backoff()
+        return None
+
+    if response.status_code == 404:
+        # An empty document parses as "nothing found" and is cached, so the page is not probed again
+        logger.warning(f"Page not found: {url}")
+        return ""
+
+    if response.status_code != 200:
+        logger.warning(f"Unexpected HTTP status {response.status_code} for {url}")
+        return None
+
+    return response.text
+
+def canonical_url(url):
+    """Return the URL with its query parameters sorted, for use as a cache key."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(query=urlencode(sorted(parse_qsl(parts.query)))))
+
+class ScholarFetcher:
+    """Fetch Scholar pages over HTTP, falling back to a browser for CAPTCHAs.
+
+    The browser is only started the first time Scholar asks for a CAPTCHA,
+    and is then reused for the remaining fallbacks. Throttling and network
+    errors are left to the caller's retries. With a
+    :class:`~scholar_citations.cache.PageCache`, fresh cached pages are served
+    without any request, and expired ones are used instead of the browser
+    when Scholar throttles. Pages are only cached once the caller has parsed
+    them and hands them to :meth:`store`.
+    """
+
+    def __init__(self, visible=True, cache=None):
+        self.visible = visible
+        self.cache = cache
+        self.driver = None
+        self._browser_lock = threading.Lock()
+
+    def get(self, url, wait_for=None, refresh=False):
+        """Return the HTML of a page, or None if it could not be loaded.
+
+        ``wait_for`` is a CSS selector the browser fallback waits for before
+        reading the page source. With ``refresh``, cached copies are ignored,
+        e.g. when retrying a page that did not parse.
+        """
+        if self.cache and not refresh:
+            cached = self.cache.get(canonical_url(url))
+            if cached is not None:
+                return cached
+
+        try:
+            html = fetch_html(url)
+        except CaptchaError:
+            stale = None if refresh else self._get_stale(url)
+            if stale is not None:
+                return stale
+            return self._get_with_browser(url, wait_for)
+
+        if html is None and not refresh:
+            return self._get_stale(url)
+        return html
+
+    async def get_async(self, client, url, wait_for=None, refresh=False):
+        """Async variant of :meth:`get`; the browser fallback runs in a worker thread."""
+        if self.cache and not refresh:
+            cached = self.cache.get(canonical_url(url))
+            if cached is not None:
+                return cached
+
+        try:
+            html = await fetch_html_async(client, url)
+        except CaptchaError:
+            stale = None if refresh else self._get_stale(url)
+            if stale is not None:
+                return stale
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._get_with_browser, url, wait_for)
+
+        if html is None and not refresh:
+            return self._get_stale(url)
+        return html
+
+    def _get_stale(self, url):
+        if not self.cache:
+            return None
+
+        stale = self.cache.get(canonical_url(url), allow_stale=True)
+        if stale is not None:
+            logger.info(f"Using expired cached copy of {url}")
+        return stale
+
+    def store(self, url, html):
+        """Cache a page that the caller has parsed successfully."""
+        if not self.cache or html is None:
+            return
+
+        # Pages served from the cache are left alone, so an expired copy keeps its age
+        key = canonical_url(url)
+        if self.cache.get(key, allow_stale=True) != html:
+            self.cache.set(key, html)
+
+    def _get_with_browser(self, url, wait_for):
+        # A single browser is shared, so fallbacks are serialized
+        with self._browser_lock:
+            try:
+                return self._get_with_browser_locked(url, wait_for)
+            except InvalidSessionIdException:
+                # Only a dead browser session warrants paying for a new browser
+                logger.warning("Browser session lost, restarting browser")
+                self._quit_driver()
+                return self._get_with_browser_locked(url, wait_for)
+
+    def _get_with_browser_locked(self, url, wait_for):
+        if self.driver is None:
+            logger.info("Falling back to browser for CAPTCHA recovery")
+            self.driver = create_stealth_driver(headless=not self.visible)
+
+        if not safe_get_url(self.driver, url):
+            return None
+
+        # The driver's implicit wait makes this poll inside the browser
+        if wait_for and not self.driver.find_elements(By.CSS_SELECTOR, wait_for):
+            logger.debug(f"Timeout waiting for {wait_for} on {url}")
+
+        return self.driver.page_source
+
+    def _quit_driver(self):
+        try:
+            self.driver.quit()
+        except WebDriverException as e:
+            logger.debug(f"Error quitting browser: {e}")
+        self.driver = None
+
+    def close(self):
+        """Shut down the fallback browser, if one was started."""
+        if self.driver:
+            self._quit_driver()
@@ -1,35 +1,187 @@
 """Functions for parsing Google Scholar content."""
 
+import functools
 import re
+from urllib.parse import urljoin
 
+from selectolax.lexbor import LexborHTMLParser
+
+CAPTCHA_INDICATORS = [
+    "our systems have detected unusual traffic",
+    "please show you're not a robot",
+    "please solve this captcha",
+    "we're sorry...",
+    "unusual traffic from your computer network",
+    "your computer or network may be sending automated queries"
+]
+
+# One case-insensitive pass over the page instead of lowercasing it and scanning per indicator.
+# The pattern is also valid as a JavaScript RegExp, for probing pages inside the browser.
+CAPTCHA_PATTERN = "|".join(re.escape(indicator) for indicator in CAPTCHA_INDICATORS)
+_CAPTCHA_RE = re.compile(CAPTCHA_PATTERN, re.IGNORECASE)
+
+# Scholar's own CAPTCHA interstitial, which can be served without any of the phrases above
+CAPTCHA_MARKUP = 'id="gs_captcha_ccl"'
+
+# Author name clean-up, compiled once since extract_authors runs for every citation
+_ET_AL = re.compile(r'\s+et al\.?')
+_PAREN = re.compile(r'\([^)]*\)')
+_INITIAL = re.compile(r'([A-Z])\.')
+_WS = re.compile(r'\s+')
+
+# Only exact counts; Scholar prefixes estimates with "About"
+_RESULT_COUNT = re.compile(r'^([\d,]+) results?')
+
+def _text(node):
+    """Return the stripped text content of a node, or '' if missing."""
+    return node.text().strip() if node is not None else ""
+
+def page_has_captcha(page_text):
+    """Check if page HTML looks like a Google CAPTCHA or block page."""
+    return CAPTCHA_MARKUP in page_text or bool(_CAPTCHA_RE.search(page_text))
+
+def parse_author_details(html):
+    """Parse the author name and affiliation from a profile page."""
+    tree = LexborHTMLParser(html)
+    
+    author_name = _text(tree.css_first("#gsc_prf_in"))
+    if not author_name:
+        return {'name': 'Unknown'}
+    
+    details = {'name': author_name}
+    
+    affiliation = tree.css_first(".gsc_prf_il")
+    if affiliation is not None:
+        details['affiliation'] = _text(affiliation)
+    
+    return details
+
+def parse_publication_rows(html, base_url):
+    """Parse the raw publication rows (``tr.gsc_a_tr``) of a profile page."""
+    tree = LexborHTMLParser(html)
+    rows = []
+    
+    # Drop the mobile-only ", <year>" suffix that Scholar appends to venues
+    for hidden in tree.css(".gs_oph"):
+        hidden.decompose()
+    
+    for row in tree.css("tr.gsc_a_tr"):
+        title_element = row.css_first("a.gsc_a_at")
+        gray_elements = row.css(".gs_gray")
+        citation_element = row.css_first("a.gsc_a_ac")
+        year_element = row.css_first(".gsc_a_h")
+        
+        title_href = title_element.attributes.get("href") if title_element is not None else None
+        citation_href = citation_element.attributes.get("href") if citation_element is not None else None
+        
+        rows.append({
+            'title': _text(title_element),
+            'url': urljoin(base_url, title_href) if title_href else None,
+            'authors': _text(gray_elements[0]) if len(gray_elements) > 0 else "",
+            'venue': _text(gray_elements[1]) if len(gray_elements) > 1 else "",
+            'citations': _text(citation_element),
+            'citation_url': urljoin(base_url, citation_href) if citation_href else None,
+            'year': _text(year_element)
+        })
+    
+    return rows
+
+def parse_citation_results(html, base_url):
+    """Parse the raw search results (``div.gs_ri``) of a "Cited by" page."""
+    tree = LexborHTMLParser(html)
+    results = []
+    
+    for result in tree.css("div.gs_ri"):
+        title_element = result.css_first(".gs_rt")
+        link_element = title_element.css_first("a[href]") if title_element is not None else None
+        
+        results.append({
+            'title': _text(title_element),
+            'url': urljoin(base_url, link_element.attributes["href"]) if link_element is not None else None,
+            'info': _text(result.css_first(".gs_a"))
+        })
+    
+    return results
+
+def has_next_page(html):
+    """Check if a results page has an enabled "Next" pagination button."""
+    tree = LexborHTMLParser(html)
+    
+    for button in tree.css(".gs_btnPR"):
+        if "Next" in button.text() and "disabled" not in button.attributes:
+            return True
+    
+    return False
+
+def parse_result_count(html):
+    """Parse the exact total from a results page's "N results" header, or None if absent or estimated."""
+    tree = LexborHTMLParser(html)
+    
+    match = _RESULT_COUNT.search(_text(tree.css_first("#gs_ab_md")))
+    return int(match.group(1).replace(',', '')) if match else None
+
+def is_empty_citation_page(html):
+    """Check if a "Cited by" page reports that there are no citations."""
+    # Pages Scholar answered with 404 are represented by an empty document
+    if not html or "no citations were found" in html.lower():
+        return True
+    
+    tree = LexborHTMLParser(html)
+    return tree.css_first("#gs_ccl_results") is not None and tree.css_first("div.gs_ri") is None
+
+# The same author strings recur across the citations of a profile's papers
+@functools.lru_cache(maxsize=4096)
 def extract_authors(author_string):
-    """Extract and normalize author names from a string."""
+    """Extract and normalize author names from a string, as a tuple."""
     if not author_string:
-        return []
+        return ()
     
-    # Process "et al." format
-    author_string = re.sub(r'\s+et al\.?', '', author_string)
+    # Process "et al." format and remove affiliations in parentheses, which may contain commas
+    author_string = _PAREN.sub('', _ET_AL.sub('', author_string))
+    
+    # Handle initials before lowercasing (e.g., "J.S. Smith" -> "j s smith")
+    author_string = _INITIAL.sub(r'\1 ', author_string)
     
     # Split by comma and normalize
     authors = []
     for author in author_string.split(','):
-        # Remove affiliations in parentheses
-        author = re.sub(r'\([^)]*\)', '', author)
-        author = author.strip().lower()
+        # Normalize spacing and remove extra whitespace
+        author = _WS.sub(' ', author).strip().lower()
         
         # Skip empty strings
         if not author:
             continue
-            
-        # Handle initials (e.g., "J.S. Smith" -> "j s smith")
-        author = re.sub(r'([A-Z])\.', r'\1 ', author)
-        
-        # Normalize spacing and remove extra whitespace
-        author = re.sub(r'\s+', ' ', author)
         
         authors.append(author)
     
-    return authors
+    return tuple(authors)
+
+def _last_token(author):
+    """Return the last word of a normalized author name."""
+    return author.rsplit(' ', 1)[-1]
+
+def author_surnames(authors):
+    """Return the set of last names (last word) of normalized author names.
+    
+    :func:`similar_authors` only matches names whose last words are equal,
+    so two author lists with disjoint surname sets cannot overlap.
+    """
+    return frozenset(_last_token(author) for author in authors if author)
+
+def author_keys(authors):
+    """Return the matching keys of normalized author names.
+    
+    Names of several words give a (last name, first initial) key, and
+    single-word names a (name, None) key.
+    """
+    keys = set()
+    for author in authors:
+        words = author.split()
+        if len(words) > 1:
+            keys.add((words[-1], words[0][0]))
+        elif words:
+            keys.add((words[0], None))
+    return frozenset(keys)
 
 def similar_authors(author1, author2, threshold=0.7):
     """Check if two author names are similar using more sophisticated matching."""
@@ -58,14 +210,25 @@ def similar_authors(author1, author2, threshold=0.7):
                 return True
     return False
 
-def has_author_overlap(authors1, authors2):
-    """Check if there is any overlap between two lists of author names."""
+def has_author_overlap(authors1, authors2, keys1=None):
+    """Check if there is any overlap between two lists of author names.
+    
+    Equivalent to calling :func:`similar_authors` on every pair, but done
+    with set operations on :func:`author_keys`. ``keys1`` may be passed to
+    reuse the precomputed keys of ``authors1``.
+    """
     if not authors1 or not authors2:
         return False
-        
-    for a1 in authors1:
-        for a2 in authors2:
-            if similar_authors(a1, a2):
-                return True
     
-    return False
\ No newline at end of file
+    if keys1 is None:
+        keys1 = author_keys(authors1)
+    keys2 = author_keys(authors2)
+    
+    # Same last name and first initial, or the same single-word name
+    if not keys1.isdisjoint(keys2):
+        return True
+    
+    # A single-word name matches any name ending in it
+    lone1 = {surname for surname, initial in keys1 if initial is None}
+    lone2 = {surname for surname, initial in keys2 if initial is None}
+    return any(surname in lone2 for surname, _ in keys1) or any(surname in lone1 for surname, _ in keys2)
@@ -1,16 +1,34 @@
 """General utility functions."""
 
 import logging
-import json
+import os
 import time
+import orjson
 
 logger = logging.getLogger(__name__)
 
-def save_interim_results(results, output_file):
-    """Save intermediate results to avoid losing progress."""
+# Monotonic time of the last interim save, per output file
+_last_saved = {}
+
+def save_interim_results(results, output_file, min_interval=10.0):
+    """Save intermediate results to avoid losing progress.
+    
+    Saves are skipped if the same file was written less than ``min_interval``
+    seconds ago, so callers can call this after every step.
+    """
     if not output_file:
         return
+    
+    now = time.monotonic()
+    last = _last_saved.get(output_file)
+    if last is not None and now - last < min_interval:
+        return
+    _last_saved[output_file] = now
         
-    with open(f"{output_file}.partial", 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2)
+    # Write to a temporary file and rename it, so a crash never leaves a truncated .partial
+    partial_file = f"{output_file}.partial"
+    tmp_file = f"{partial_file}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, partial_file)
     logger.info(f"Saved interim results to {output_file}.partial")
\ No newline at end of file
@@ -28,6 +28,9 @@ setup(
         "selenium",
         "webdriver-manager",
         "fake-useragent",
+        "httpx[http2]",
+        "selectolax>=0.3.0",
+        "orjson",
     ],
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -1,115 +1,276 @@
 import argparse
+import asyncio
+import functools
+import hashlib
+import multiprocessing
 import time
 import random
-import json
+import logging
+import os
 import re
+import shelve
+import threading
+import httpx
+import orjson
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from selectolax.lexbor import LexborHTMLParser
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+logger = logging.getLogger(__name__)
+
+SCHOLAR_BASE_URL = "https://scholar.google.com"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+
+# Seconds to wait for a page's content to appear in the browser
+PAGE_LOAD_TIMEOUT = 15
+
+# Rows per page of a profile's publication list (Scholar's maximum)
+PUBLICATIONS_PAGE_SIZE = 100
+
+# Number of publications fetched at the same time
+MAX_CONCURRENT_REQUESTS = 4
+
+_ET_AL_RE = re.compile(r' et al\.')
+_PAREN_RE = re.compile(r'\([^)]*\)')
+_BRACKET_RE = re.compile(r'\[[^\]]+\]')
+
+CAPTCHA_INDICATORS = [
+    "our systems have detected unusual traffic",
+    "please show you're not a robot",
+    "unusual traffic from your computer network"
+]
+
+# Fetched publication and citation lists are kept here between runs, one file per profile
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "scholar_self_citations")
+
+# Scholar profiles and citation lists change slowly, so a week-old copy is still useful
+CACHE_TTL = 7 * 24 * 60 * 60
+
+# Requests the headless browser never needs to make
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.gif", "*.woff*",
+    "*google-analytics*", "*doubleclick*", "*gstatic.com/scholar/images*"
+]
+
+@functools.lru_cache(maxsize=1)
+def chromedriver_path():
+    """Resolve the ChromeDriver binary once per process."""
+    return ChromeDriverManager().install()
+
 def setup_driver(headless=True):
     """Set up and return a Chrome WebDriver instance."""
     options = Options()
     if headless:
         options.add_argument("--headless")
+        
+        # Only the page source is read, so skip images, stylesheets and fonts nobody will see
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2
+        })
+        options.add_argument("--blink-settings=imagesEnabled=false")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--window-size=1920,1080")
     
+    # Return from driver.get on DOMContentLoaded; the rows waited for are in the initial HTML
+    options.page_load_strategy = "eager"
+    
+    # Skip background work the scraper has no use for
+    for flag in ("--disable-extensions", "--disable-background-networking", "--disable-sync",
+                 "--disable-default-apps", "--disable-translate"):
+        options.add_argument(flag)
+    
     # Use a realistic user agent
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(chromedriver_path())
     driver = webdriver.Chrome(service=service, options=options)
     
+    if headless:
+        # Drop images, fonts and trackers before they reach the network stack
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    
     return driver
 
 def random_delay(min_seconds=2, max_seconds=5):
     """Add a random delay to avoid detection."""
     time.sleep(min_seconds + random.random() * (max_seconds - min_seconds))
 
+async def random_delay_async(min_seconds=2, max_seconds=5):
+    """Async variant of random_delay that lets other requests proceed while waiting."""
+    await asyncio.sleep(min_seconds + random.random() * (max_seconds - min_seconds))
+
 def extract_authors(author_string):
     """Extract and normalize author names from a string."""
     if not author_string:
         return []
     
     # Handle "et al." format
-    if " et al." in author_string:
-        author_string = author_string.replace(" et al.", "")
+    author_string = _ET_AL_RE.sub('', author_string)
     
     # Split by comma and normalize
     authors = []
     for author in author_string.split(','):
         # Remove affiliations in parentheses
-        author = re.sub(r'\([^)]*\)', '', author)
+        author = _PAREN_RE.sub('', author)
         author = author.strip().lower()
         if author:
             authors.append(author)
     
     return authors
 
-def has_author_overlap(authors1, authors2):
-    """Check if there is any overlap between two lists of author names."""
-    for a1 in authors1:
-        for a2 in authors2:
-            # Check if names match (exact or partial)
-            if a1 == a2 or (len(a1) > 3 and a1 in a2) or (len(a2) > 3 and a2 in a1):
-                return True
-    return False
+def author_prefixes(author_list):
+    """Return the names long enough to be matched as part of another name."""
+    return tuple(author for author in author_list if len(author) > 3)
 
-def get_author_details(driver, profile_url):
-    """Get basic details about the author."""
-    driver.get(profile_url)
-    random_delay()
+def has_author_overlap(record1, record2):
+    """Check if two publication/citation records share an author (exact or partial name match)."""
+    if not record1['author_list'] or not record2['author_list']:
+        return False
     
-    try:
-        # Wait for profile to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "gsc_prf_in"))
-        )
+    if record1['author_set'] & record2['author_set']:
+        return True
+    
+    # Only a shorter name can be inside another; equal lengths were covered by the set check
+    return (any(len(a1) < len(a2) and a1 in a2 for a1 in record1['author_prefixes'] for a2 in record2['author_list']) or
+            any(len(a2) < len(a1) and a2 in a1 for a2 in record2['author_prefixes'] for a1 in record1['author_list']))
+
+def open_cache(profile_url, cache_dir=CACHE_DIR):
+    """Open the on-disk cache of a profile's fetched publication and citation lists."""
+    # A file per profile means parallel workers never write to the same one
+    os.makedirs(cache_dir, exist_ok=True)
+    name = hashlib.sha1(profile_url.encode()).hexdigest()[:16]
+    return shelve.open(os.path.join(cache_dir, name))
+
+def cache_get(cache, key):
+    """Return a cached value, or None if there is no cache or the entry is missing or expired."""
+    if cache is None:
+        return None
+    
+    entry = cache.get(key)
+    if entry is None or time.time() - entry[0] > CACHE_TTL:
+        return None
+    
+    return entry[1]
+
+def cache_set(cache, key, value):
+    """Store a value with the time it was fetched."""
+    if cache is not None:
+        cache[key] = (time.time(), value)
+
+def is_blocked(html):
+    """Check if a page looks like a Google CAPTCHA or block page."""
+    html = html.lower()
+    return any(indicator in html for indicator in CAPTCHA_INDICATORS)
+
+def text_of(node):
+    """Return the stripped text of a node, or '' if missing."""
+    return node.text().strip() if node is not None else ""
+
+class BrowserFallback:
+    """Chrome browser that is only started once a page cannot be fetched directly."""
+    
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.driver = None
+        self.wait = None
+        self._lock = threading.Lock()
+    
+    def get(self, url, wait_class):
+        """Load a page in the browser and return its HTML."""
+        # Fallbacks run in worker threads but share one browser
+        with self._lock:
+            return self._get_locked(url, wait_class)
+    
+    def _get_locked(self, url, wait_class):
+        if self.driver is None:
+            logger.info("Direct requests are blocked, falling back to the browser...")
+            self.driver = setup_driver(self.headless)
+            self.wait = WebDriverWait(self.driver, PAGE_LOAD_TIMEOUT)
+        else:
+            # Pause between navigations of the same session, not between a load and its wait
+            random_delay(0.5, 1.5)
+        
+        self.driver.get(url)
+        
+        try:
+            self.wait.until(
+                EC.presence_of_element_located((By.CLASS_NAME, wait_class))
+            )
+        except TimeoutException:
+            logger.warning(f"Timeout waiting for {wait_class} on {url}")
         
-        author_name = driver.find_element(By.ID, "gsc_prf_in").text
-        return {'name': author_name}
+        return self.driver.page_source
+    
+    def quit(self):
+        if self.driver is not None:
+            self.driver.quit()
+
+async def fetch_page(client, browser, url, wait_class):
+    """Fetch a page over HTTP, using the browser only when Scholar blocks the request."""
+    await random_delay_async()
     
-    except (TimeoutException, NoSuchElementException) as e:
-        print(f"Error getting author details: {e}")
+    try:
+        response = await client.get(url)
+        if response.status_code == 200 and not is_blocked(response.text):
+            return response.text
+        logger.warning(f"Request for {url} returned status {response.status_code} or a CAPTCHA")
+    except httpx.HTTPError as e:
+        logger.warning(f"Error fetching {url}: {e}")
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, browser.get, url, wait_class)
+
+def get_author_details(html):
+    """Get basic details about the author from a profile page."""
+    author_name = text_of(LexborHTMLParser(html).css_first("#gsc_prf_in"))
+    if not author_name:
+        logger.error("Error getting author details: profile name not found")
         return {'name': 'Unknown'}
+    
+    return {'name': author_name}
+
+def publications_page_url(profile_url, cstart):
+    """Return the URL of one page of a profile's publication list."""
+    parts = urlsplit(profile_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key not in ('cstart', 'pagesize')]
+    query += [('cstart', cstart), ('pagesize', PUBLICATIONS_PAGE_SIZE)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
 
-def get_publications(driver, profile_url, max_papers=None):
-    """Get the list of publications for an author."""
-    driver.get(profile_url)
-    random_delay()
+async def get_publications(client, browser, profile_url, max_papers=None, first_page=None):
+    """Get the list of publications for an author.
     
+    ``first_page`` is the already fetched HTML of the first page, if any.
+    """
     try:
-        # Wait for publications to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "gsc_a_tr"))
-        )
-        
-        # Click "Show more" until all papers are loaded or max_papers is reached
+        # Each page shows whether there is another, so pages are requested one at a time
+        paper_rows = []
+        cstart = 0
         while True:
-            paper_rows = driver.find_elements(By.CLASS_NAME, "gsc_a_tr")
+            if cstart == 0 and first_page is not None:
+                html = first_page
+            else:
+                html = await fetch_page(client, browser, publications_page_url(profile_url, cstart), "gsc_a_tr")
             
-            if max_papers and len(paper_rows) >= max_papers:
-                break
+            page_rows = LexborHTMLParser(html).css("tr.gsc_a_tr")
+            paper_rows.extend(page_rows)
             
-            try:
-                show_more_button = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((By.ID, "gsc_bpf_more"))
-                )
-                show_more_button.click()
-                random_delay(1, 3)
-            except TimeoutException:
-                # No more "Show more" button
+            # A short page is the end of the list
+            if len(page_rows) < PUBLICATIONS_PAGE_SIZE or (max_papers and len(paper_rows) >= max_papers):
                 break
+            cstart += PUBLICATIONS_PAGE_SIZE
         
-        # Get all paper rows
-        paper_rows = driver.find_elements(By.CLASS_NAME, "gsc_a_tr")
         if max_papers:
             paper_rows = paper_rows[:max_papers]
         
@@ -117,55 +278,56 @@ def get_publications(driver, profile_url, max_papers=None):
         for paper_row in paper_rows:
             try:
                 # Get paper title and link
-                title_element = paper_row.find_element(By.CLASS_NAME, "gsc_a_at")
-                title = title_element.text
-                paper_url = title_element.get_attribute("href")
+                title_element = paper_row.css_first(".gsc_a_at")
+                title = text_of(title_element)
+                paper_url = SCHOLAR_BASE_URL + title_element.attributes.get("href", "")
                 
                 # Get authors (first gs_gray element)
-                authors_element = paper_row.find_elements(By.CLASS_NAME, "gs_gray")[0]
-                authors = authors_element.text
+                authors = text_of(paper_row.css_first(".gs_gray"))
+                author_list = extract_authors(authors)
                 
                 # Get citation count and URL
-                citation_element = paper_row.find_element(By.CLASS_NAME, "gsc_a_ac")
-                citation_text = citation_element.text.strip()
+                citation_element = paper_row.css_first(".gsc_a_ac")
+                citation_text = text_of(citation_element)
                 citation_count = int(citation_text) if citation_text.isdigit() else 0
-                citation_url = citation_element.get_attribute("href") if citation_count > 0 else None
+                citation_url = citation_element.attributes.get("href") if citation_count > 0 else None
                 
                 publications.append({
                     'title': title,
                     'url': paper_url,
                     'authors': authors,
-                    'author_list': extract_authors(authors),
+                    'author_list': author_list,
+                    'author_set': frozenset(author_list),
+                    'author_prefixes': author_prefixes(author_list),
                     'citation_count': citation_count,
                     'citation_url': citation_url
                 })
             
             except Exception as e:
-                print(f"Error extracting publication details: {e}")
+                logger.warning(f"Error extracting publication details: {e}")
                 continue
         
         return publications
     
     except Exception as e:
-        print(f"Error getting publications: {e}")
+        logger.error(f"Error getting publications: {e}")
         return []
 
-def get_citations(driver, citation_url, max_citations=None):
+async def get_citations(client, browser, citation_url, max_citations=None, cache=None):
     """Get the list of papers that cite a specific publication."""
     if not citation_url:
         return []
     
-    driver.get(citation_url)
-    random_delay()
+    cache_key = f"citations {citation_url} {max_citations}"
+    cached = cache_get(cache, cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        # Wait for citations to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "gs_ri"))
-        )
+        html = await fetch_page(client, browser, citation_url, "gs_ri")
         
         # Get citation elements
-        citation_elements = driver.find_elements(By.CLASS_NAME, "gs_ri")
+        citation_elements = LexborHTMLParser(html).css("div.gs_ri")
         
         # Limit if max_citations specified
         if max_citations:
@@ -175,90 +337,131 @@ def get_citations(driver, citation_url, max_citations=None):
         for citation_element in citation_elements:
             try:
                 # Get title
-                title_element = citation_element.find_element(By.CLASS_NAME, "gs_rt")
-                title = title_element.text
+                title = text_of(citation_element.css_first(".gs_rt"))
                 # Clean up title (remove [PDF], [HTML], etc.)
-                title = re.sub(r'\[[^\]]+\]', '', title).strip()
+                title = _BRACKET_RE.sub('', title).strip()
                 
                 # Get authors and publication info
-                info_element = citation_element.find_element(By.CLASS_NAME, "gs_a")
-                info_text = info_element.text
+                info_text = text_of(citation_element.css_first(".gs_a"))
                 
                 # Extract just the author part (before first dash)
                 authors = info_text.split('-')[0].strip()
                 
+                author_list = extract_authors(authors)
                 citations.append({
                     'title': title,
                     'authors': authors,
-                    'author_list': extract_authors(authors)
+                    'author_list': author_list,
+                    'author_set': frozenset(author_list),
+                    'author_prefixes': author_prefixes(author_list)
                 })
             
             except Exception as e:
-                print(f"Error extracting citation details: {e}")
+                logger.warning(f"Error extracting citation details: {e}")
                 continue
         
+        # An empty list is more likely a failed fetch than a paper without citations, so it is not cached
+        if citations:
+            cache_set(cache, cache_key, citations)
+        
         return citations
     
     except Exception as e:
-        print(f"Error getting citations: {e}")
+        logger.error(f"Error getting citations: {e}")
         return []
 
-def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper=None, headless=True):
-    """Analyze self-citations for a Google Scholar profile."""
-    driver = setup_driver(headless)
+async def analyze_publication(client, browser, cache, semaphore, i, total, pub, max_citations_per_paper,
+                              details_stream=None):
+    """Fetch one publication's citations and find its self-citations.
     
-    try:
-        print("Getting author details...")
-        author = get_author_details(driver, profile_url)
+    Returns the number of self-citations and their details. With a
+    ``details_stream``, the details are written there as JSON Lines instead.
+    """
+    async with semaphore:
+        logger.info(f"[{i}/{total}] Analyzing: {pub['title'][:50]}{'...' if len(pub['title']) > 50 else ''}")
         
-        print(f"Getting publications for {author['name']}...")
-        publications = get_publications(driver, profile_url, max_papers)
+        if not (pub['citation_count'] > 0 and pub['citation_url']):
+            logger.debug(f"  [{i}] No citations to analyze.")
+            return 0, []
         
-        if not publications:
-            print("No publications found.")
-            return {
-                'author': author['name'],
-                'total_papers': 0,
-                'analyzed_papers': 0,
-                'total_citations': 0,
-                'self_citations': 0,
-                'self_citation_percentage': 0,
-                'self_citation_details': []
-            }
+        if not pub['author_list']:
+            # No citation can share an author with it, so its citations need not be fetched
+            logger.warning(f"  [{i}] No authors found for this paper, skipping its citations.")
+            return 0, []
         
-        print(f"Found {len(publications)} publications.")
+        citations_to_check = min(pub['citation_count'], max_citations_per_paper) if max_citations_per_paper else pub['citation_count']
+        logger.debug(f"  [{i}] Checking {citations_to_check} of {pub['citation_count']} citations...")
         
-        total_citations = 0
-        self_citations = 0
-        self_citation_details = []
+        citations = await get_citations(client, browser, pub['citation_url'], max_citations_per_paper, cache)
         
-        for i, pub in enumerate(publications, 1):
-            print(f"[{i}/{len(publications)}] Analyzing: {pub['title'][:50]}{'...' if len(pub['title']) > 50 else ''}")
-            
-            if pub['citation_count'] > 0 and pub['citation_url']:
-                total_citations += pub['citation_count']
-                
-                citations_to_check = min(pub['citation_count'], max_citations_per_paper) if max_citations_per_paper else pub['citation_count']
-                print(f"  Checking {citations_to_check} of {pub['citation_count']} citations...")
-                
-                citations = get_citations(driver, pub['citation_url'], max_citations_per_paper)
-                
-                pub_self_citations = 0
-                for citation in citations:
-                    if has_author_overlap(pub['author_list'], citation['author_list']):
-                        self_citations += 1
-                        pub_self_citations += 1
-                        
-                        self_citation_details.append({
-                            'original_paper': pub['title'],
-                            'citing_paper': citation['title'],
-                            'original_authors': pub['authors'],
-                            'citing_authors': citation['authors']
-                        })
-                
-                print(f"  Found {pub_self_citations} self-citations.")
+        details = []
+        for citation in citations:
+            if has_author_overlap(pub, citation):
+                details.append({
+                    'original_paper': pub['title'],
+                    'citing_paper': citation['title'],
+                    'original_authors': pub['authors'],
+                    'citing_authors': citation['authors']
+                })
+        
+        logger.info(f"  [{i}] Found {len(details)} self-citations.")
+        
+        if details_stream is not None:
+            for detail in details:
+                details_stream.write(orjson.dumps(detail) + b"\n")
+            details_stream.flush()
+            return len(details), []
+        
+        return len(details), details
+
+async def analyze_self_citations_async(profile_url, max_papers=None, max_citations_per_paper=None, headless=True,
+                                       concurrency=MAX_CONCURRENT_REQUESTS, use_cache=True, details_stream=None):
+    """Analyze self-citations for a Google Scholar profile, fetching publications concurrently."""
+    browser = BrowserFallback(headless)
+    cache = open_cache(profile_url) if use_cache else None
+    
+    try:
+        async with httpx.AsyncClient(http2=True, headers={"User-Agent": USER_AGENT}, follow_redirects=True, timeout=30) as client:
+            publications_key = f"publications {profile_url} {max_papers}"
+            cached = cache_get(cache, publications_key)
+            if cached is not None:
+                author, publications = cached
+                logger.info(f"Using cached publication list for {author['name']}")
             else:
-                print("  No citations to analyze.")
+                logger.info("Getting author details...")
+                # The first page of the publication list also carries the profile header
+                first_page = await fetch_page(client, browser, publications_page_url(profile_url, 0), "gsc_a_tr")
+                author = get_author_details(first_page)
+                
+                logger.info(f"Getting publications for {author['name']}...")
+                publications = await get_publications(client, browser, profile_url, max_papers, first_page)
+                if publications:
+                    cache_set(cache, publications_key, (author, publications))
+            
+            if not publications:
+                logger.warning("No publications found.")
+                return {
+                    'author': author['name'],
+                    'total_papers': 0,
+                    'analyzed_papers': 0,
+                    'total_citations': 0,
+                    'self_citations': 0,
+                    'self_citation_percentage': 0,
+                    'self_citation_details': []
+                }
+            
+            logger.info(f"Found {len(publications)} publications.")
+            
+            semaphore = asyncio.Semaphore(concurrency)
+            per_publication = await asyncio.gather(*(
+                analyze_publication(client, browser, cache, semaphore, i, len(publications), pub, max_citations_per_paper,
+                                    details_stream)
+                for i, pub in enumerate(publications, 1)
+            ))
+        
+        total_citations = sum(pub['citation_count'] for pub in publications if pub['citation_url'])
+        self_citations = sum(count for count, _ in per_publication)
+        self_citation_details = [detail for _, details in per_publication for detail in details]
         
         # Calculate results
         self_citation_percentage = (self_citations / total_citations * 100) if total_citations > 0 else 0
@@ -274,57 +477,125 @@ def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper
         }
     
     finally:
-        driver.quit()
+        browser.quit()
+        if cache is not None:
+            cache.close()
+
+def analyze_self_citations(profile_url, max_papers=None, max_citations_per_paper=None, headless=True, use_cache=True,
+                           details_file=None):
+    """Analyze self-citations for a Google Scholar profile.
+    
+    With ``details_file``, self-citations are streamed to that file as JSON
+    Lines while the analysis runs, and left out of the returned results.
+    """
+    if details_file is None:
+        return asyncio.run(analyze_self_citations_async(profile_url, max_papers, max_citations_per_paper, headless,
+                                                        use_cache=use_cache))
+    
+    with open(details_file, 'wb') as details_stream:
+        return asyncio.run(analyze_self_citations_async(profile_url, max_papers, max_citations_per_paper, headless,
+                                                        use_cache=use_cache, details_stream=details_stream))
+
+def analyze_profile(url, max_papers=None, max_citations_per_paper=None, headless=True, use_cache=True):
+    """Analyze one profile in a worker process, returning None if the analysis fails."""
+    # Spawned workers do not run main(), so they configure their own logging
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
+    try:
+        return analyze_self_citations(url, max_papers, max_citations_per_paper, headless, use_cache)
+    except Exception as e:
+        logger.exception(f"Error analyzing {url}: {e}")
+        return None
+
+def print_results(results):
+    """Print a summary of one profile's analysis."""
+    print("\n======= RESULTS =======")
+    print(f"Author: {results['author']}")
+    print(f"Papers analyzed: {results['analyzed_papers']}")
+    print(f"Total citations: {results['total_citations']}")
+    print(f"Self-citations: {results['self_citations']}")
+    print(f"Self-citation percentage: {results['self_citation_percentage']:.2f}%")
+    
+    if results['self_citation_details']:
+        print("\nSelf-citation examples (first 5):")
+        for i, citation in enumerate(results['self_citation_details'][:5], 1):
+            print(f"{i}. Original: {citation['original_paper'][:50]}{'...' if len(citation['original_paper']) > 50 else ''}")
+            print(f"   Citing: {citation['citing_paper'][:50]}{'...' if len(citation['citing_paper']) > 50 else ''}")
+        
+        if len(results['self_citation_details']) > 5:
+            print(f"\n... and {len(results['self_citation_details']) - 5} more self-citations")
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze self-citations on Google Scholar')
-    parser.add_argument('url', help='Google Scholar profile URL')
+    parser.add_argument('url', nargs='?', help='Google Scholar profile URL')
+    parser.add_argument('--urls-file', type=str, default=None, help='File with one profile URL per line to analyze in parallel')
+    parser.add_argument('--workers', type=int, default=2, help='Number of profiles analyzed at once with --urls-file')
     parser.add_argument('--max-papers', type=int, default=None, help='Maximum number of papers to analyze')
     parser.add_argument('--max-citations', type=int, default=None, help='Maximum number of citations to check per paper')
     parser.add_argument('--output', type=str, default=None, help='Output file for detailed results (JSON)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write self-citations to the output file as JSON Lines while analyzing (implied by a .jsonl output)')
     parser.add_argument('--visible', action='store_true', help='Show browser window during analysis')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch every page again instead of reusing cached results')
     args = parser.parse_args()
     
+    if not args.url and not args.urls_file:
+        parser.error("a profile URL or --urls-file is required")
+    
+    stream = args.stream or (args.output or '').endswith('.jsonl')
+    if stream and not args.output:
+        parser.error("--stream needs --output")
+    if stream and args.urls_file:
+        parser.error("--stream writes a single profile's self-citations and cannot be used with --urls-file")
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     try:
-        print(f"Starting analysis of: {args.url}")
         if args.max_papers:
-            print(f"Limiting to {args.max_papers} papers")
+            logger.info(f"Limiting to {args.max_papers} papers")
         if args.max_citations:
-            print(f"Limiting to {args.max_citations} citations per paper")
-        
-        results = analyze_self_citations(
-            args.url, 
-            max_papers=args.max_papers, 
-            max_citations_per_paper=args.max_citations,
-            headless=not args.visible
-        )
+            logger.info(f"Limiting to {args.max_citations} citations per paper")
         
-        print("\n======= RESULTS =======")
-        print(f"Author: {results['author']}")
-        print(f"Papers analyzed: {results['analyzed_papers']}")
-        print(f"Total citations: {results['total_citations']}")
-        print(f"Self-citations: {results['self_citations']}")
-        print(f"Self-citation percentage: {results['self_citation_percentage']:.2f}%")
-        
-        if results['self_citation_details']:
-            print("\nSelf-citation examples (first 5):")
-            for i, citation in enumerate(results['self_citation_details'][:5], 1):
-                print(f"{i}. Original: {citation['original_paper'][:50]}{'...' if len(citation['original_paper']) > 50 else ''}")
-                print(f"   Citing: {citation['citing_paper'][:50]}{'...' if len(citation['citing_paper']) > 50 else ''}")
+        if args.urls_file:
+            with open(args.urls_file, encoding='utf-8') as f:
+                urls = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+            logger.info(f"Starting analysis of {len(urls)} profiles with {args.workers} workers")
+            
+            analyze = functools.partial(
+                analyze_profile,
+                max_papers=args.max_papers,
+                max_citations_per_paper=args.max_citations,
+                headless=not args.visible,
+                use_cache=not args.no_cache
+            )
+            # Each worker starts its own browser if it needs one, and browsers do not survive a fork
+            with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+                results = [result for result in pool.map(analyze, urls) if result is not None]
             
-            if len(results['self_citation_details']) > 5:
-                print(f"\n... and {len(results['self_citation_details']) - 5} more self-citations")
+            for profile_results in results:
+                print_results(profile_results)
+        else:
+            logger.info(f"Starting analysis of: {args.url}")
+            results = analyze_self_citations(
+                args.url, 
+                max_papers=args.max_papers, 
+                max_citations_per_paper=args.max_citations,
+                headless=not args.visible,
+                use_cache=not args.no_cache,
+                details_file=args.output if stream else None
+            )
+            print_results(results)
         
+        if stream:
+            print(f"\nSelf-citations saved to: {args.output}")
         # Save detailed results if output file specified
-        if args.output:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2)
+        elif args.output:
+            with open(args.output, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
             print(f"\nDetailed results saved to: {args.output}")
     
     except Exception as e:
-        print(f"\nError during analysis: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error during analysis: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
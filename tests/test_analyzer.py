@@ -1,16 +1,93 @@
 """Tests for the Google Scholar citation analyzer."""
 
+import asyncio
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
-from scholar_citations.parsers import extract_authors, similar_authors, has_author_overlap
+import httpx
+import orjson
+from unittest.mock import patch, MagicMock, AsyncMock
+from urllib.parse import urlsplit, parse_qs
+from scholar_citations.parsers import (
+    extract_authors,
+    similar_authors,
+    has_author_overlap,
+    author_surnames,
+    author_keys,
+    parse_publication_rows,
+    parse_citation_results,
+    has_next_page,
+    parse_result_count,
+    page_has_captcha
+)
+from scholar_citations.analyzer import get_author_details, get_publications, sample_page_starts, get_citations
+from scholar_citations.cache import PageCache
+from scholar_citations.http_client import ScholarFetcher, CaptchaError, _response_html
+from scholar_citations.driver import RateLimiter
+from scholar_citations.utils import save_interim_results
+
+PROFILE_HTML = """
+<table><tr class="gsc_a_tr">
+<td class="gsc_a_t"><a href="/citations?view_op=view_citation" class="gsc_a_at">A Paper</a>
+<div class="gs_gray">J Smith, A Jones</div><div class="gs_gray">Nature<span class="gs_oph">, 2020</span></div></td>
+<td class="gsc_a_c"><a href="https://scholar.google.com/scholar?cites=123" class="gsc_a_ac gs_ibl">12</a></td>
+<td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">2020</span></td>
+</tr></table>
+"""
+
+CITATIONS_HTML = """
+<div class="gs_r gs_or gs_scl"><div class="gs_ri">
+<h3 class="gs_rt"><span class="gs_ctg2">[PDF]</span> <a href="https://example.org/p">Citing Paper</a></h3>
+<div class="gs_a">J Smith, B Brown - Journal, 2021 - example.org</div>
+</div></div>
+<button class="gs_btnPR"><span class="gs_lbl">Next</span></button>
+"""
+
+CITED_BY_URL = "https://scholar.google.com/scholar?cites=123"
+
+def citations_page(count, authors="C Doe", result_count=None):
+    """Build a "Cited by" page with ``count`` results and a "Next" button."""
+    header = f'<div id="gs_ab_md"><div class="gs_ab_mdw">{result_count} results</div></div>' if result_count else ""
+    results = "".join(
+        f'<div class="gs_ri"><h3 class="gs_rt"><a href="https://example.org/{i}">Paper {i}</a></h3>'
+        f'<div class="gs_a">{authors} - Journal, 2021</div></div>'
+        for i in range(count)
+    )
+    return f'{header}<div id="gs_res_ccl_mid">{results}</div><button class="gs_btnPR"><span class="gs_lbl">Next</span></button>'
+
+class FakeFetcher:
+    """Serve canned "Cited by" pages by start offset, recording each request.
+    
+    A page given as a list is served one entry per request; exceptions in it are raised.
+    """
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        self.stored = []
+    
+    async def get_async(self, client, url, wait_for=None, refresh=False):
+        start = int(parse_qs(urlsplit(url).query).get('start', ['0'])[0])
+        self.requests.append((start, refresh))
+        
+        page = self.pages[start]
+        if isinstance(page, list):
+            page = page.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+    
+    def store(self, url, html):
+        self.stored.append(int(parse_qs(urlsplit(url).query).get('start', ['0'])[0]))
 
 class TestParsers(unittest.TestCase):
     """Test cases for parsing functions."""
     
     def test_extract_authors(self):
         """Test extraction of author names."""
-        self.assertEqual(extract_authors("J Smith, A Jones"), ["j smith", "a jones"])
-        self.assertEqual(extract_authors("Smith JS, Jones A et al."), ["smith js", "jones a"])
+        self.assertEqual(extract_authors("J Smith, A Jones"), ("j smith", "a jones"))
+        self.assertEqual(extract_authors("Smith JS, Jones A et al."), ("smith js", "jones a"))
+        self.assertEqual(extract_authors("J.S. Smith, A Jones (MIT, USA)"), ("j s smith", "a jones"))
         
     def test_similar_authors(self):
         """Test author name similarity detection."""
@@ -23,5 +100,270 @@ class TestParsers(unittest.TestCase):
         """Test detection of overlapping authors."""
         self.assertTrue(has_author_overlap(["j smith", "a jones"], ["j smith", "b brown"]))
         self.assertFalse(has_author_overlap(["j smith", "a jones"], ["c doe", "b brown"]))
+    
+    def test_author_keys(self):
+        """Test the keys used for set-based overlap detection."""
+        self.assertEqual(author_keys(["j smith", "jones"]), frozenset({("smith", "j"), ("jones", None)}))
+        self.assertTrue(has_author_overlap(["a jones"], ["jones", "b brown"]))
+        self.assertFalse(has_author_overlap(["a smith"], ["j smith"]))
+    
+    def test_author_surnames(self):
+        """Test that surname sets rule out non-overlapping author lists."""
+        self.assertEqual(author_surnames(["j smith", "a jones"]), frozenset({"smith", "jones"}))
+        self.assertTrue(author_surnames(["j smith"]).isdisjoint(author_surnames(["c doe", "b brown"])))
+
+class TestHtmlParsers(unittest.TestCase):
+    """Test cases for Scholar HTML parsing."""
+    
+    def test_parse_publication_rows(self):
+        """Test extraction of publication rows from a profile page."""
+        rows = parse_publication_rows(PROFILE_HTML, "https://scholar.google.com")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], "A Paper")
+        self.assertEqual(rows[0]['url'], "https://scholar.google.com/citations?view_op=view_citation")
+        self.assertEqual(rows[0]['authors'], "J Smith, A Jones")
+        self.assertEqual(rows[0]['venue'], "Nature")
+        self.assertEqual(rows[0]['citations'], "12")
+        self.assertEqual(rows[0]['citation_url'], "https://scholar.google.com/scholar?cites=123")
+        self.assertEqual(rows[0]['year'], "2020")
+    
+    def test_parse_citation_results(self):
+        """Test extraction of citing papers from a "Cited by" page."""
+        results = parse_citation_results(CITATIONS_HTML, "https://scholar.google.com")
+        self.assertEqual(len(results), 1)
+        self.assertIn("Citing Paper", results[0]['title'])
+        self.assertEqual(results[0]['url'], "https://example.org/p")
+        self.assertEqual(results[0]['info'], "J Smith, B Brown - Journal, 2021 - example.org")
+        self.assertTrue(has_next_page(CITATIONS_HTML))
+        self.assertIsNone(parse_result_count(CITATIONS_HTML))
+        self.assertEqual(parse_result_count('<div id="gs_ab_md"><div class="gs_ab_mdw">1,230 results (<b>0.03</b> sec)</div></div>'), 1230)
+        self.assertIsNone(parse_result_count('<div id="gs_ab_md"><div class="gs_ab_mdw">About 1,230 results</div></div>'))
+    
+    def test_page_has_captcha(self):
+        """Test detection of block pages and the CAPTCHA interstitial."""
+        self.assertTrue(page_has_captcha("<p>Our systems have detected unusual traffic</p>"))
+        self.assertTrue(page_has_captcha('<div id="gs_captcha_ccl"></div>'))
+        self.assertFalse(page_has_captcha(CITATIONS_HTML))
+
+class TestProfilePages(unittest.TestCase):
+    """Test cases for reading a profile's publication list."""
+    
+    def test_first_page_is_reused(self):
+        """Test that an already fetched first page is not requested again."""
+        fetcher = MagicMock()
+        profile_url = "https://scholar.google.com/citations?user=abc"
+        first_page = '<div id="gsc_prf_in">Jane Smith</div>' + PROFILE_HTML
+        
+        self.assertEqual(get_author_details(fetcher, profile_url, first_page)['name'], "Jane Smith")
+        publications = get_publications(fetcher, profile_url, first_page=first_page)
+        self.assertEqual([publication['title'] for publication in publications], ["A Paper"])
+        fetcher.get.assert_not_called()
+
+class TestCitationSampling(unittest.TestCase):
+    """Test cases for choosing which citation pages to sample."""
+    
+    def test_sample_page_starts(self):
+        """Test that sampled pages are spread, listed, and stable across runs."""
+        url = "https://scholar.google.com/scholar?cites=123"
+        starts = sample_page_starts(url, 5000, 100, 20)
+        self.assertEqual(len(starts), 5)
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(starts[0], 0)
+        self.assertTrue(all(start % 20 == 0 and start < 1000 for start in starts))
+        self.assertEqual(starts, sample_page_starts(url, 5000, 100, 20))
+
+@patch("scholar_citations.analyzer.human_like_delay_async", new=AsyncMock())
+class TestGetCitations(unittest.TestCase):
+    """Test cases for paging through a publication's citations."""
+    
+    def run_get_citations(self, fetcher, **kwargs):
+        return asyncio.run(get_citations(fetcher, None, CITED_BY_URL, ("j smith",), **kwargs))
+    
+    def requested_starts(self, fetcher):
+        return [start for start, _ in fetcher.requests]
+    
+    def test_retry_keeps_collected_citations(self):
+        """Test that only the failing page is retried, bypassing the cache."""
+        fetcher = FakeFetcher({
+            0: citations_page(20, authors="J Smith"),
+            20: [None, citations_page(20)],
+            40: [RuntimeError("browser died"), None, None]
+        })
+        citations = self.run_get_citations(fetcher, citation_count=100)
+        
+        self.assertEqual(len(citations), 40)
+        self.assertEqual(sum(citation['is_self_citation'] for citation in citations), 20)
+        self.assertEqual(fetcher.requests, [(0, False), (20, False), (20, True), (40, False), (40, True), (40, True)])
+        self.assertEqual(fetcher.stored, [0, 20])
+    
+    def test_stops_at_citation_count(self):
+        """Test that no page past the profile's citation count is requested."""
+        fetcher = FakeFetcher({0: citations_page(20), 20: citations_page(5)})
+        self.assertEqual(len(self.run_get_citations(fetcher, citation_count=25)), 25)
+        self.assertEqual(self.requested_starts(fetcher), [0, 20])
+    
+    def test_stops_at_result_count(self):
+        """Test that Scholar's exact result count lowers the profile's citation count."""
+        fetcher = FakeFetcher({0: citations_page(20, result_count=30), 20: citations_page(10)})
+        self.assertEqual(len(self.run_get_citations(fetcher, citation_count=100)), 30)
+        self.assertEqual(self.requested_starts(fetcher), [0, 20])
+    
+    def test_samples_pages_when_capped(self):
+        """Test that a capped paper reads the sampled pages only."""
+        starts = sample_page_starts(CITED_BY_URL, 200, 40, 20)
+        fetcher = FakeFetcher({start: citations_page(20) for start in starts})
+        self.assertEqual(len(self.run_get_citations(fetcher, citation_count=200, max_citations=40)), 40)
+        self.assertEqual(self.requested_starts(fetcher), starts)
+    
+    def test_samples_within_result_count(self):
+        """Test that sampled pages are redrawn within a result count below the citation count."""
+        fetcher = FakeFetcher({start: citations_page(20, result_count=100) for start in range(0, 1000, 20)})
+        citations = self.run_get_citations(fetcher, citation_count=1000, max_citations=60)
+        
+        self.assertEqual(len(citations), 60)
+        starts = self.requested_starts(fetcher)
+        self.assertEqual(starts, sample_page_starts(CITED_BY_URL, 100, 60, 20))
+        self.assertTrue(all(start < 100 for start in starts))
+    
+    def test_early_stop_pages(self):
+        """Test that sampling stops after pages without possible self-citations."""
+        fetcher = FakeFetcher({start: citations_page(20) for start in range(0, 400, 20)})
+        citations = self.run_get_citations(fetcher, citation_count=400, early_stop_pages=2)
+        self.assertEqual(len(citations), 40)
+        self.assertEqual(self.requested_starts(fetcher), [0, 20])
+
+@patch("scholar_citations.http_client.rate_limiter", new=RateLimiter())
+class TestScholarFetcher(unittest.TestCase):
+    """Test cases for fetching and caching Scholar pages."""
+    
+    def test_response_statuses(self):
+        """Test that 404s read as empty pages, throttling as a failure, and CAPTCHAs raise."""
+        request = httpx.Request("GET", CITED_BY_URL)
+        self.assertEqual(_response_html(CITED_BY_URL, httpx.Response(404, request=request)), "")
+        self.assertIsNone(_response_html(CITED_BY_URL, httpx.Response(429, request=request)))
+        self.assertIsNone(_response_html(CITED_BY_URL, httpx.Response(503, request=request)))
+        with self.assertRaises(CaptchaError):
+            _response_html(CITED_BY_URL, httpx.Response(200, text='<div id="gs_captcha_ccl"></div>', request=request))
+        self.assertEqual(_response_html(CITED_BY_URL, httpx.Response(200, text="<html></html>", request=request)), "<html></html>")
+    
+    def fetch(self, fetcher, responses, coroutine):
+        """Run a coroutine taking an async client that answers with ``responses`` in turn."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return responses.pop(0)
+        
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await coroutine(client)
+        
+        return asyncio.run(run()), requests
+    
+    def test_browser_only_used_for_captchas(self):
+        """Test that throttling and server errors are left to the caller instead of the browser."""
+        fetcher = ScholarFetcher()
+        responses = [
+            httpx.Response(429),
+            httpx.Response(503),
+            httpx.Response(200, text='<div id="gs_captcha_ccl"></div>')
+        ]
+        
+        async def get_pages(client):
+            return [await fetcher.get_async(client, CITED_BY_URL) for _ in range(3)]
+        
+        with patch.object(fetcher, "_get_with_browser", return_value="<html>browser</html>") as browser:
+            pages, requests = self.fetch(fetcher, responses, get_pages)
+        
+        self.assertEqual(pages, [None, None, "<html>browser</html>"])
+        self.assertEqual(len(requests), 3)
+        browser.assert_called_once_with(CITED_BY_URL, None)
+    
+    def test_stale_page_used_when_throttled(self):
+        """Test that an expired cached copy is served when Scholar throttles."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PageCache(os.path.join(tmp, "pages.sqlite"), ttl=-1)
+            cache.set(CITED_BY_URL, "<html>stale</html>")
+            fetcher = ScholarFetcher(cache=cache)
+            
+            html, requests = self.fetch(fetcher, [httpx.Response(429)], lambda client: fetcher.get_async(client, CITED_BY_URL))
+            self.assertEqual(html, "<html>stale</html>")
+            self.assertEqual(len(requests), 1)
+            cache.close()
+    
+    @patch("scholar_citations.analyzer.human_like_delay_async", new=AsyncMock())
+    def test_unparsed_pages_are_not_cached(self):
+        """Test that a page without results is refetched on retry and never cached."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PageCache(os.path.join(tmp, "pages.sqlite"))
+            fetcher = ScholarFetcher(cache=cache)
+            responses = [httpx.Response(200, text="<html>Loading...</html>"), httpx.Response(200, text=citations_page(5))]
+            
+            citations, requests = self.fetch(
+                fetcher, responses,
+                lambda client: get_citations(fetcher, client, CITED_BY_URL, ("j smith",), citation_count=5)
+            )
+            self.assertEqual(len(citations), 5)
+            self.assertEqual(len(requests), 2)
+            
+            # The parsed page is now served from the cache
+            citations, requests = self.fetch(
+                fetcher, [],
+                lambda client: get_citations(fetcher, client, CITED_BY_URL, ("j smith",), citation_count=5)
+            )
+            self.assertEqual(len(citations), 5)
+            self.assertEqual(requests, [])
+            cache.close()
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the request rate limiter."""
+    
+    def test_only_blocks_when_budget_exhausted(self):
+        """Test that requests within the budget do not wait."""
+        limiter = RateLimiter(max_requests=2, window=60)
+        self.assertEqual(limiter._reserve(), 0.0)
+        self.assertEqual(limiter._reserve(), 0.0)
+        self.assertGreater(limiter._reserve(), 0.0)
+    
+    def test_backoff_doubles_window(self):
+        """Test that backing off slows the rate down, up to a limit."""
+        limiter = RateLimiter(max_requests=30, window=60, max_window=180)
+        limiter.backoff()
+        self.assertEqual(limiter.window, 120)
+        limiter.backoff()
+        self.assertEqual(limiter.window, 180)
+
+class TestPageCache(unittest.TestCase):
+    """Test cases for the on-disk page cache."""
+    
+    def test_expired_pages_only_served_when_stale_allowed(self):
+        """Test that expired pages are kept as a fallback."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PageCache(os.path.join(tmp, "pages.sqlite"), ttl=60)
+            cache.set("https://scholar.google.com/a", "<html>a</html>")
+            self.assertEqual(cache.get("https://scholar.google.com/a"), "<html>a</html>")
+            self.assertIsNone(cache.get("https://scholar.google.com/b"))
+            
+            cache.ttl = -1
+            self.assertIsNone(cache.get("https://scholar.google.com/a"))
+            self.assertEqual(cache.get("https://scholar.google.com/a", allow_stale=True), "<html>a</html>")
+            cache.close()
+
+class TestInterimResults(unittest.TestCase):
+    """Test cases for saving interim results."""
+    
+    def test_saves_are_throttled(self):
+        """Test that saves within the minimum interval are skipped."""
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "results.json")
+            save_interim_results({'analyzed_papers': 1}, output_file)
+            save_interim_results({'analyzed_papers': 2}, output_file)
+            with open(f"{output_file}.partial", 'rb') as f:
+                self.assertEqual(orjson.loads(f.read()), {'analyzed_papers': 1})
+            self.assertFalse(os.path.exists(f"{output_file}.partial.tmp"))
+            
+            save_interim_results({'analyzed_papers': 3}, output_file, min_interval=0)
+            with open(f"{output_file}.partial", 'rb') as f:
+                self.assertEqual(orjson.loads(f.read()), {'analyzed_papers': 3})
 
 # More test cases...
\ No newline at end of file